@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Representative periods
+
+Time series aggregation for long horizon sizing: the days of a dataset are clustered into k representative days
+with weights, and a sizing model is built with one block per representative day, linked by a shared scale factor
+of the PV source (AbsScalablePowerSource).
+"""
+
+from batteries import AbsBatteryV0
+from maingrids import AbsMainGridV0
+from sources import AbsFixedPowerLoad, AbsScalablePowerSource
+from base_units import refresh_profiles
+from models import microgrid_data
+from sweep import split_periods
+from pyomo.environ import AbstractModel, Block, Constraint, Objective, Param, Var, NonNegativeReals, \
+    SolverFactory, TransformationFactory, value
+from pyomo.dae import ContinuousSet, Integral
+from timeit import default_timer
+
+import numpy as np
+import pandas as pd
+import logging
+
+__all__ = ['cluster_periods', 'representative_model', 'representative_data', 'discretize', 'aggregation_report']
+logger = logging.getLogger('lms2.aggregation')
+
+
+def _kmedoids(X, k, n_iter=100, seed=0):
+    """ k-medoids clustering of the rows of X, with k-means++ like initialization."""
+
+    rng = np.random.RandomState(seed)
+    D = np.sqrt(((X[:, np.newaxis, :] - X[np.newaxis, :, :]) ** 2).sum(axis=2))
+
+    medoids = [rng.randint(len(X))]
+    for _ in range(1, k):
+        d = D[:, medoids].min(axis=1) ** 2
+        medoids.append(rng.choice(len(X), p=d / d.sum()) if d.sum() > 0 else rng.randint(len(X)))
+    medoids = np.array(medoids)
+
+    for _ in range(n_iter):
+        labels = np.argmin(D[:, medoids], axis=1)
+        new = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            if len(members):
+                new[c] = members[np.argmin(D[np.ix_(members, members)].sum(axis=1))]
+        if np.array_equal(new, medoids):
+            break
+        medoids = new
+
+    return medoids, np.argmin(D[:, medoids], axis=1)
+
+
+def _kmeans(X, k, n_iter=100, seed=0):
+    """ k-means clustering of the rows of X, initialized with the k-medoids."""
+
+    medoids, labels = _kmedoids(X, k, n_iter=n_iter, seed=seed)
+    centers = X[medoids].copy()
+    for _ in range(n_iter):
+        labels = np.argmin(((X[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2), axis=1)
+        new = np.array([X[labels == c].mean(axis=0) if np.any(labels == c) else centers[c] for c in range(k)])
+        if np.allclose(new, centers):
+            break
+        centers = new
+    return centers, labels
+
+
+def cluster_periods(df, k, columns=None, period='1D', method='kmedoids', seed=0):
+    """
+    Clusters the periods (days by default) of a dataset into k representative periods.
+
+    Profiles are normalized by column before clustering. With 'kmedoids', representative periods are actual periods
+    of the dataset, with 'kmeans' they are the centroids of the clusters.
+
+    :param DataFrame df: data indexed by timestamps, e.g. PV, load and price profiles
+    :param int k: number of representative periods
+    :param columns: columns used for clustering (all by default)
+    :param period: duration of the periods
+    :param str method: 'kmedoids' or 'kmeans'
+    :param int seed: seed of the random initialization
+    :return: list of representative periods (DataFrame indexed in seconds), weights (number of periods of each
+             cluster) and labels (cluster of each period, indexed by period start)
+    """
+
+    columns = list(df.columns) if columns is None else columns
+    periods = split_periods(df, period=period)
+    if k > len(periods):
+        raise ValueError(f'k={k} is greater than the number of complete periods ({len(periods)}).')
+
+    values = np.stack([d[columns].to_numpy(dtype=float) for _, d in periods])     # (periods, steps, columns)
+    scale  = np.ptp(values.reshape(-1, len(columns)), axis=0)
+    scale[scale == 0] = 1.
+    X = (values / scale).reshape(len(periods), -1)
+
+    if method == 'kmedoids':
+        medoids, labels = _kmedoids(X, k, seed=seed)
+        representatives = [periods[i][1] for i in medoids]
+    elif method == 'kmeans':
+        centers, labels = _kmeans(X, k, seed=seed)
+        index = periods[0][1].index
+        representatives = [pd.DataFrame(c.reshape(len(index), len(columns)) * scale, index=index, columns=columns)
+                           for c in centers]
+    else:
+        raise ValueError(f"method should be either 'kmedoids' or 'kmeans', but is actually {method}.")
+
+    weights = np.bincount(labels, minlength=k).astype(float)
+    labels  = pd.Series(labels, index=[start for start, _ in periods], name='cluster')
+
+    logger.info(f'{len(periods)} periods clustered into {k} representative periods.')
+    return representatives, weights, labels
+
+
+def representative_model(weights, horizon=24*3600, soc='cyclic'):
+    """
+    Sizing model with one block per representative period.
+
+    Each block 'd<k>' contains a main grid (AbsMainGridV0), a scalable PV source (AbsScalablePowerSource),
+    a load (AbsFixedPowerLoad) and a battery (AbsBatteryV0). Scale factors of the sources are linked to the shared
+    variable 'scale', and the objective is the weighted sum of the costs of the blocks, plus the cost of the scale.
+    Blocks should be discretized one by one, since the finite difference transformation only expands the integrals
+    of the block it is applied to, see :func:`discretize`.
+
+    :param weights: weights of the representative periods
+    :param horizon: duration of the periods, in seconds
+    :param str soc: battery state of charge carry-over rule. 'cyclic': the final state of each period is equal
+                    to its initial state, 'fixed': initial and final states are given by the data (e0, ef)
+    :return: AbstractModel
+    """
+
+    if soc not in ('cyclic', 'fixed'):
+        raise ValueError(f"soc should be either 'cyclic' or 'fixed', but is actually {soc}.")
+
+    m = AbstractModel(doc='Representative periods sizing model')
+    m.scale      = Var(within=NonNegativeReals, initialize=1, doc='shared scale factor of the PV source')
+    m.scale_cost = Param(default=0, mutable=True, doc='cost of the scale factor over the aggregated horizon (euros)')
+
+    def _power_balance(d, t):
+        return d.mg.p[t] + d.s.p_scaled[t] == d.l.p[t] + d.b.p[t]
+
+    def _scale(d):
+        return d.s.scale_fact == d.parent_block().scale
+
+    def _soc(d):
+        return d.b.e[d.b.time.first()] == d.b.e[d.b.time.last()]
+
+    for k in range(len(weights)):
+        d = Block()
+        m.add_component(f'd{k}', d)
+        d.time  = ContinuousSet(bounds=(0, horizon))
+        d.mg    = AbsMainGridV0()
+        d.s     = AbsScalablePowerSource()
+        d.l     = AbsFixedPowerLoad()
+        d.b     = AbsBatteryV0()
+        d.power_balance = Constraint(d.time, rule=_power_balance)
+        d.link_scale    = Constraint(rule=_scale)
+        if soc == 'cyclic':
+            d.cyclic_soc = Constraint(rule=_soc)
+        d.int = Integral(d.time, wrt=d.time, rule=lambda d, i: d.mg.inst_cost[i])
+
+    weights = [float(w) for w in weights]
+    m.obj = Objective(rule=lambda m: sum(w * m.component(f'd{k}').int for k, w in enumerate(weights))
+                      + m.scale_cost * m.scale)
+
+    return m
+
+
+def representative_data(periods, source='P_pv', load='P_load_1', battery=None, grid=None, soc='cyclic'):
+    """
+    Data of :func:`representative_model`.
+
+    :param periods: representative periods, indexed by time in seconds
+    :param source: column of the PV profile (for a unit scale factor)
+    :param load: column of the load profile
+    :param dict battery: battery parameters, see :func:`models.microgrid_data`
+    :param dict grid: main grid parameters, see :func:`models.microgrid_data`
+    :param str soc: battery state of charge carry-over rule, see :func:`representative_model`
+    :return: dict
+    """
+
+    battery = {} if battery is None else dict(battery)
+    if soc == 'cyclic':
+        battery.update(e0=None, ef=None)
+
+    data = {}
+    for k, df in enumerate(periods):
+        d = microgrid_data(df, source=source, load=load, battery=battery, grid=grid)[None]
+        d['b'] = {None: {key: val for key, val in d['b'][None].items() if val != {None: None}}}
+        data[f'd{k}'] = {None: d}
+    return {None: data}
+
+
+def discretize(inst, nfe, scheme='BACKWARD'):
+    """
+    Discretizes each block of an instance of :func:`representative_model`, and re-evaluates its profiles.
+
+    :param inst: instance of :func:`representative_model`
+    :param int nfe: number of finite elements of each period
+    :param str scheme: discretization scheme of the finite difference transformation
+    :return: None
+    """
+    for d in inst.component_objects(Block, descend_into=False):
+        TransformationFactory('dae.finite_difference').apply_to(d, nfe=nfe, scheme=scheme)
+    refresh_profiles(inst)
+
+
+def _solve(weights, periods, horizon, solver, data_kwds):
+    t = default_timer()
+    inst = representative_model(weights, horizon=horizon, soc=data_kwds.get('soc', 'cyclic'))\
+        .create_instance(representative_data(periods, **data_kwds))
+    discretize(inst, nfe=len(periods[0]) - 1)
+    SolverFactory(solver).solve(inst, load_solutions=True)
+    return {'blocks': len(periods), 'objective': value(inst.obj), 'scale': value(inst.scale),
+            'time (s)': default_timer() - t}
+
+
+def aggregation_report(df, ks, columns=None, period='1D', method='kmedoids', solver='glpk', **data_kwds):
+    """
+    Compares the sizing obtained with k representative periods to the one of the full model, i.e. the same model
+    with one block per period of the dataset.
+
+    :param DataFrame df: data indexed by timestamps
+    :param ks: numbers of representative periods
+    :param columns: columns used for clustering
+    :param period: duration of the periods
+    :param str method: clustering method, see :func:`cluster_periods`
+    :param str solver: name of the solver
+    :param data_kwds: keyword arguments of :func:`representative_data`
+    :return: DataFrame, with one row per k and one for the full model
+    """
+
+    horizon = pd.Timedelta(period).total_seconds()
+    periods = [d for _, d in split_periods(df, period=period)]
+
+    rows = {'full': _solve(np.ones(len(periods)), periods, horizon, solver, data_kwds)}
+    for k in ks:
+        representatives, weights, _ = cluster_periods(df, k, columns=columns, period=period, method=method)
+        rows[k] = _solve(weights, representatives, horizon, solver, data_kwds)
+
+    res = pd.DataFrame.from_dict(rows, orient='index')
+    res['objective error (%)'] = 100 * (res['objective'] / res.loc['full', 'objective'] - 1)
+    res['scale error (%)']     = 100 * (res['scale'] / res.loc['full', 'scale'] - 1)
+    return res
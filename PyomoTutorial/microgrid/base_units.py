@@ -4,13 +4,17 @@ Basic Units, multi-physical base model
 """
 
 from units import Unit
+from params import ProfileParam
 from pyomo.environ import *
 from pyomo.network import Port
 from pyomo.dae import DerivativeVar
 
+import numpy as np
+
 
 __all__ = ['AbsDynUnit', 'AbsFixedFlowLoad', 'AbsFixedFlowSource', 'AbsFlowSource',
-           'AbsFlowLoad', 'AbsEffortSource',  '_init_input', '_set_bounds', 'fix_profile', 'bound_profile']
+           'AbsFlowLoad', 'AbsEffortSource',  '_init_input', 'interp_profile', '_set_bounds', 'fix_profile',
+           'set_profile', 'refresh_profiles', 'bound_profile', 'apply_bound_profile']
 
 
 class AbsDynUnit(Unit):
@@ -33,19 +37,23 @@ class AbsDynUnit(Unit):
     def pplot(self, **kwargs):
 
         """
-        Plotting method for AbsDyn Unit. It iterates on the component ctype of the Block and plots it.
-        Currently, it only works with Var, Constraints and Expressions.
+        Plotting method for AbsDyn Unit. It extracts the time indexed components of type ctype of the Block,
+        using :func:`utils.to_frame`, and plots them.
+        Currently, it only works with Var, Param, Constraints and Expressions.
 
         :param kwargs:
         :return: lines, axe and figure
         """
 
-        from .utils import pplot
+        from utils import pplot, to_frame
 
         ctype = kwargs.pop('ctype', Var)
         active = kwargs.pop('active', True)
 
-        lines, ax, fig = pplot(*[v for v in self.component_objects(ctype=ctype, active=active)], **kwargs)
+        df = to_frame(self, ctypes=(ctype,), active=active, descend_into=False)
+        df.columns = [self.component(c).name for c in df.columns]
+
+        lines, ax, fig = pplot(df, **kwargs)
 
         return lines, ax, fig
 
@@ -92,22 +100,43 @@ class AbsEffortSource(AbsDynUnit):
         super().__init__(*args, **kwargs)
         self.add_component(effort_name, Var(self.time, initialize=0, within=Reals))
         
-def _init_input(m, t,
-                index_name='profile_index',
-                profile_name='profile_value'):
+def _interp(x, xp, fp):
+    """
+    Linear interpolation of the profile (xp, fp) at points x.
+
+    Vectorized equivalent of scipy's interp1d(xp, fp, kind='linear', fill_value='extrapolate'), i.e. values outside
+    of [xp[0], xp[-1]] are linearly extrapolated using the first and last segments of the profile.
 
+    :param x: points where the profile is evaluated
+    :param xp: increasing profile index
+    :param fp: profile values
+    :return: numpy array of interpolated values
     """
-    Rule for initiating variable profile using interpolation of a given profile.
+    x  = np.atleast_1d(np.asarray(x,  dtype=float))
+    xp = np.asarray(xp, dtype=float)
+    fp = np.asarray(fp, dtype=float)
+
+    y = np.interp(x, xp, fp)
+    if len(xp) > 1:
+        low = x < xp[0]
+        up  = x > xp[-1]
+        if low.any():
+            y[low] = fp[0] + (x[low] - xp[0]) * (fp[1] - fp[0]) / (xp[1] - xp[0])
+        if up.any():
+            y[up] = fp[-1] + (x[up] - xp[-1]) * (fp[-1] - fp[-2]) / (xp[-1] - xp[-2])
+    return y
+
+
+def _profile_arrays(m, index_name='profile_index', profile_name='profile_value'):
+    """
+    Checks the profile components of a block and returns them as two sorted numpy arrays.
 
     :param m: Block
-    :param t: Set time
     :param index_name: name of the index set
     :param profile_name: name of the profile parameter
-    :return: None
+    :return: profile index and profile values, as numpy arrays
     """
 
-    from scipy.interpolate.interpolate import interp1d
-
     if not hasattr(m, index_name):
         raise AttributeError(f'{m} object has no attribute {index_name}.'
                              f' Cannot proceed interpolation for initialization')
@@ -121,16 +150,105 @@ def _init_input(m, t,
         raise TypeError(f'{profile_name} is not a instance of Param,'
                         f' but is actually : f{type(m.component(profile_name))}. Cannot proceed.')
 
-    interp_x = list(m.component(index_name).value)
-    interp_y = list(m.component(profile_name).extract_values().values())
-    funct = interp1d(interp_x, interp_y, kind='linear', fill_value='extrapolate')
-    b = float(funct(t))
-    if b is None:
-        Warning('Interpolation of the given profile returned None. '
-                'It might be an error from profile or interpolation function.')
-        return 0
-    else:
-        return b
+    profile = m.component(profile_name)
+    keys    = sorted(m.component(index_name))
+
+    return np.array(keys, dtype=float), np.array([value(profile[k]) for k in keys], dtype=float)
+
+
+def _get_profile_cache(m):
+    """ Returns the profile cache of a block, creating it if necessary."""
+
+    cache = getattr(m, '_profile_cache', None)
+    if cache is None:
+        cache = {}
+        m._profile_cache = cache
+    return cache
+
+
+def _time_stamp(m, full=False):
+    """
+    Identifies the content of the time set of a block.
+
+    The stamp is kept on the block, and the content of the time set is only read again when its length or bounds
+    change, or if full is True, so that rules evaluated for each time step do not read the whole set.
+    """
+    key   = (len(m.time), m.time.first(), m.time.last())
+    cache = getattr(m, '_time_stamp_cache', None)
+    if full or cache is None or cache[0] != key:
+        cache = (key, tuple(m.time))
+        m._time_stamp_cache = cache
+    return cache[1]
+
+
+def _cached_profile(m, index_name='profile_index', profile_name='profile_value', check=False):
+    """
+    Returns the cache entry of a profile, (re)computing it if the time set of the block has changed.
+
+    An entry is a tuple (stamp, xp, fp, values) where stamp identifies the content of the time set,
+    (xp, fp) are the profile arrays and values maps every time of m.time to its interpolated value.
+    Profile arrays are read again from the block whenever the time set has changed, or if check is True, in which
+    case the entry is recomputed if the time set or the profile parameters have been written since. Otherwise, the
+    time set is only checked for a change of its length or bounds: values of the points missing from a stale entry
+    are interpolated when requested, see :func:`_init_input`.
+    """
+
+    cache = _get_profile_cache(m)
+    stamp = _time_stamp(m, full=check)
+    entry = cache.get((index_name, profile_name), None)
+
+    # stamps are shared by the entries of a block, comparing their contents is only needed after a full check
+    changed = entry is None or (entry[0] is not stamp and entry[0] != stamp)
+
+    if changed or check:
+        xp, fp = _profile_arrays(m, index_name=index_name, profile_name=profile_name)
+        if changed or not (np.array_equal(xp, entry[1]) and np.array_equal(fp, entry[2])):
+            times  = list(stamp)
+            entry  = (stamp, xp, fp, dict(zip(times, _interp(times, xp, fp).tolist())))
+            cache[index_name, profile_name] = entry
+
+    return entry
+
+
+def interp_profile(m, index_name='profile_index', profile_name='profile_value'):
+    """
+    Interpolation of a given profile over the whole time set of a block.
+
+    The profile is interpolated once for every point of m.time, using numpy, and the result is cached on the block.
+    The cache is invalidated when the content of m.time changes, e.g. after discretization, or when the profile
+    parameters are written.
+
+    :param m: Block
+    :param index_name: name of the index set
+    :param profile_name: name of the profile parameter
+    :return: dict mapping each time of m.time to the interpolated value
+    """
+    return _cached_profile(m, index_name=index_name, profile_name=profile_name, check=True)[3]
+
+
+def _init_input(m, t,
+                index_name='profile_index',
+                profile_name='profile_value'):
+
+    """
+    Rule for initiating variable profile using interpolation of a given profile.
+
+    Values are served from the cache of :func:`interp_profile`, so that the profile is not interpolated again
+    for each time step.
+
+    :param m: Block
+    :param t: Set time
+    :param index_name: name of the index set
+    :param profile_name: name of the profile parameter
+    :return: interpolated value at time t
+    """
+
+    _, xp, fp, values = _cached_profile(m, index_name=index_name, profile_name=profile_name)
+
+    try:
+        return values[t]
+    except KeyError:
+        return float(_interp(t, xp, fp)[0])
 
 
 def _set_bounds(m, t,
@@ -140,82 +258,194 @@ def _set_bounds(m, t,
     """
     Rule to initiating variable bounds using interpolation of two given profiles.
 
+    Both profiles are interpolated once over the time set, and served from the cache of :func:`interp_profile`.
+
     :param m: Block
     :param t: Set time
     :param str index_name: name of the index set
     :param str up_profile_name: name of the upper bound profile parameter
     :param str low_profile_name: name of the lower bound profile parameter
-    :return: None
+    :return: lower and upper bounds at time t
     """
 
-    from scipy.interpolate.interpolate import interp1d
-
-    if not hasattr(m, index_name):
-        raise AttributeError(f'{m} object has no attribute {index_name}.'
-                             f' Cannot proceed interpolation for initialization')
-    if not hasattr(m, up_profile_name):
-        raise AttributeError(f'{m} object has no attribute {up_profile_name}.'
-                             f' Cannot proceed interpolation for initialization')
-    if not hasattr(m, low_profile_name):
-        raise AttributeError(f'{m} object has no attribute {low_profile_name}.'
-                             f' Cannot proceed interpolation for initialization')
-    if not isinstance(m.component(index_name), Set):
-        raise TypeError(f'{index_name} is not a instance of Set,'
-                        f' but is actually : f{type(m.component(index_name))}. Cannot proceed.')
-    if not isinstance(m.component(up_profile_name), Param):
-        raise TypeError(f'{up_profile_name} is not a instance of Param,'
-                        f' but is actually : f{type(m.component(up_profile_name))}. Cannot proceed.')
-    if not isinstance(m.component(low_profile_name), Param):
-        raise TypeError(f'{low_profile_name} is not a instance of Param,'
-                        f' but is actually : f{type(m.component(low_profile_name))}. Cannot proceed.')
-
-    interp_x   = list(m.component(index_name).value)
-    interp_up  = list(m.component(up_profile_name).extract_values().values())
-    interp_low = list(m.component(low_profile_name).extract_values().values())
-
-    funct_up  = interp1d(interp_x, interp_up,  kind='linear', fill_value='extrapolate')
-    funct_low = interp1d(interp_x, interp_low, kind='linear', fill_value='extrapolate')
-
-    bu = float(funct_up(t))
-    bl = float(funct_low(t))
-
-    if bu is None or bl is None:
-        Warning('Interpolation of the given profile returned None. '
-                'It might be an error from profile or interpolation function.')
-        return 0, 0
-    else:
-        return bl, bu
+    return (_init_input(m, t, index_name=index_name, profile_name=low_profile_name),
+            _init_input(m, t, index_name=index_name, profile_name=up_profile_name))
 
 
-def fix_profile(m, flow_name='flow', index_name='profile_index', profile_name='profile_value'):
+def fix_profile(m, flow_name='flow', index_name='profile_index', profile_name='profile_value', array=False):
 
     """
     Method for fixing a variable to a given dynamic profile.
 
-    It replaces the variable "flow_name" by a parameter, whom initialization
+    It replaces the variable "flow_name" by a mutable parameter, whom initialization
     corresponds to the interpolation of a given profile with respect to his profile index.
     It generates One Set, named index_name, one Parameter, named profile_name.
+    The profile is registered on the block, so that it can be refreshed or replaced using :func:`refresh_profiles`
+    and :func:`set_profile`.
+
+    If array is True, "flow_name" is replaced by a :class:`params.ProfileParam` instead, and no Set nor profile
+    Parameter are created. Its data is then given as a dict mapping each point of the profile to its value, or as a
+    tuple of arrays (index, values), kept without copy, e.g. the time axis and one signal of a ProfileStore.
 
     :param m: Block
     :param str flow_name: name of the value to be fixed
     :param index_name: name of the index set
     :param profile_name: name of the profile parameter
+    :param bool array: use an array-backed ProfileParam
     :return: None
     """
 
+    if array:
+        m.del_component(flow_name)
+        m.add_component(flow_name, ProfileParam(m.time))
+        return
+
     def _rule(bl, t):
         return 0
 
     m.add_component(index_name, Set())
-    m.add_component(profile_name, Param(m.component(index_name), default=_rule))
+    m.add_component(profile_name, Param(m.component(index_name), default=_rule, mutable=True))
+
+    def _default(bl, t):
+        return _init_input(bl, t, index_name=index_name, profile_name=profile_name)
 
     m.del_component(flow_name)
-    m.add_component(flow_name, Param(m.time, default=lambda bl, t : _init_input(bl, t,
-                                                                                index_name=index_name,
-                                                                                profile_name=profile_name)))
+    m.add_component(flow_name, Param(m.time, mutable=True, default=_default))
+
+    profiles = dict(getattr(m, '_profiles', {}))
+    profiles[flow_name] = (index_name, profile_name)
+    m._profiles = profiles
+
+
+def set_profile(m, flow_name, profile_index, profile_value):
+    """
+    Replaces the profile of a parameter created by :func:`fix_profile`, without rebuilding the block.
+
+    The index set and the profile parameter are updated, and the parameter "flow_name" is re-evaluated
+    for the whole time set in one vectorized pass.
+
+    :param m: Block
+    :param str flow_name: name of the fixed value, as given to :func:`fix_profile`
+    :param profile_index: new profile index (array-like)
+    :param profile_value: new profile values (array-like), of the same length as profile_index
+    :return: None
+    """
+
+    if isinstance(m.component(flow_name), ProfileParam):
+        m.component(flow_name).set_values(profile_value, index=profile_index)
+        return
+
+    if flow_name not in getattr(m, '_profiles', {}):
+        raise KeyError(f'{m} has no profile associated with {flow_name}. Profiles should be declared using '
+                       f'fix_profile.')
+
+    index_name, profile_name = m._profiles[flow_name]
 
+    xp = np.asarray(profile_index, dtype=float)
+    fp = np.asarray(profile_value, dtype=float)
+    if xp.shape != fp.shape:
+        raise ValueError(f'profile_index and profile_value should have the same shape, '
+                         f'but are actually {xp.shape} and {fp.shape}.')
+    if np.any(np.diff(xp) < 0):
+        order  = np.argsort(xp, kind='mergesort')
+        xp, fp = xp[order], fp[order]
 
-def bound_profile(m, t, flow_name='flow',
+    index   = m.component(index_name)
+    profile = m.component(profile_name)
+    index.clear()
+    index.add(*xp.tolist())
+    profile.clear()
+    profile.store_values(dict(zip(xp.tolist(), fp.tolist())))
+
+    times  = list(m.time)
+    stamp  = _time_stamp(m, full=True)
+    values = dict(zip(times, _interp(times, xp, fp).tolist()))
+    _get_profile_cache(m)[index_name, profile_name] = (stamp, xp, fp, values)
+
+    m.component(flow_name).store_values(values)
+
+
+def refresh_profiles(model, data=None):
+    """
+    Re-evaluates every profile parameter of a model over its (discretized) time sets.
+
+    It walks every AbsDynUnit of the model and fills the parameters created by :func:`fix_profile`, including
+    ProfileParams, in one vectorized pass, instead of one default rule call per time step. Bounds declared by
+    :func:`bound_profile` are applied again. It should be called after
+    discretization, e.g. `TransformationFactory('dae.finite_difference').apply_to(inst, nfe=nfe)`.
+
+    New profiles may be given using the same data structure as `create_instance`, i.e.
+    `{None: {'s': {'profile_index': {None: index}, 'profile_value': {...}}}}`, so that a new day of data
+    can be swapped in without rebuilding the instance.
+
+    :param model: Model or Block
+    :param dict data: new profiles, with the same structure as the data of `create_instance` (optional)
+    :return: list of the refreshed parameters and bounded variables
+    """
+
+    if data is not None and None in data:
+        data = data[None]
+
+    refreshed = []
+    for blk in model.component_data_objects(Block, descend_into=True):
+        if not isinstance(blk, AbsDynUnit):
+            continue
+        arrays = [c for c in blk.component_objects(Param, descend_into=False) if isinstance(c, ProfileParam)]
+        if not arrays and not getattr(blk, '_profiles', None) and not getattr(blk, '_bounds', None):
+            continue
+
+        blk_data = data
+        for name in blk.getname(fully_qualified=True, relative_to=model).split('.'):
+            blk_data = blk_data.get(name, None) if blk_data is not None else None
+            if blk_data is not None and None in blk_data:
+                blk_data = blk_data[None]
+
+        for comp in arrays:
+            if blk_data is not None and comp.local_name in blk_data:
+                comp.set_profile(blk_data[comp.local_name])
+            else:
+                comp.refresh()
+            refreshed.append(comp)
+
+        for flow_name, (index_name, profile_name) in getattr(blk, '_profiles', {}).items():
+            if blk_data is not None and profile_name in blk_data:
+                profile_value = blk_data[profile_name]
+                if index_name in blk_data:
+                    profile_index = list(blk_data[index_name][None])
+                else:
+                    profile_index = list(profile_value.keys())
+                set_profile(blk, flow_name, profile_index, [profile_value[k] for k in profile_index])
+            else:
+                blk.component(flow_name).store_values(interp_profile(blk, index_name=index_name,
+                                                                     profile_name=profile_name))
+            refreshed.append(blk.component(flow_name))
+
+        for flow_name, (index_name, low_profile_name, up_profile_name) in getattr(blk, '_bounds', {}).items():
+            if blk_data is not None and (low_profile_name in blk_data or up_profile_name in blk_data):
+                low = blk_data.get(low_profile_name, None)
+                up  = blk_data.get(up_profile_name, None)
+                if index_name in blk_data:
+                    profile_index = sorted(blk_data[index_name][None])
+                else:
+                    profile_index = sorted((low if low is not None else up).keys())
+                values = [[p[k] for k in profile_index] if p is not None else None for p in (low, up)]
+                if low is None or up is None:
+                    # one envelope is updated, on the current index
+                    _, xp, _, _ = _cached_profile(blk, index_name=index_name, profile_name=low_profile_name,
+                                                  check=True)
+                    if index_name in blk_data or not np.array_equal(np.asarray(profile_index, dtype=float), xp):
+                        raise ValueError(f'Both {low_profile_name} and {up_profile_name} of {blk.name} are required '
+                                         f'with a new {index_name}.')
+                    profile_index = None
+                apply_bound_profile(blk, flow_name, profile_index, *values)
+            else:
+                apply_bound_profile(blk, flow_name)
+            refreshed.append(blk.component(flow_name))
+
+    return refreshed
+
+
+def bound_profile(m, flow_name='flow',
                   index_name='profile_index',
                   up_profile_name='up_profile_value',
                   low_profile_name='low_profile_value'):
@@ -223,17 +453,16 @@ def bound_profile(m, t, flow_name='flow',
     """
     Method for bounding a variable to given dynamic profiles.
 
-    It bounds the variable "flow_name" by an upper and lower constraints, whom initialization
-    corresponds to the interpolation of given profiles with respect to a given index.
-    It generates One Set, the profile's index, named index_name, and two parameters,
-    namely up_profile_name and low_profile_name.
+    It bounds the variable "flow_name" by a lower and an upper profile, interpolated with respect to a given index.
+    It generates One Set, the profile's index, named index_name, and two mutable parameters, namely up_profile_name
+    and low_profile_name. Bounds are initialized at construction, and should be applied again after discretization,
+    or when the profiles change, using :func:`apply_bound_profile` (or :func:`refresh_profiles`).
 
     :param m: Block or Model
-    :param t: time set
-    :param str flow_name:
-    :param str index_name:
-    :param str up_profile_name:
-    :param str low_profile_name:
+    :param str flow_name: name of the bounded variable
+    :param str index_name: name of the index set
+    :param str up_profile_name: name of the upper bound profile parameter
+    :param str low_profile_name: name of the lower bound profile parameter
     :return: None
     """
 
@@ -241,16 +470,79 @@ def bound_profile(m, t, flow_name='flow',
         return 0
 
     m.add_component(index_name, Set())
-    m.add_component(low_profile_name, Param(m.component(index_name), default=_rule))
-    m.add_component(up_profile_name,  Param(m.component(index_name), default=_rule))
+    m.add_component(low_profile_name, Param(m.component(index_name), default=_rule, mutable=True))
+    m.add_component(up_profile_name,  Param(m.component(index_name), default=_rule, mutable=True))
+
+    def _bounds(bl, t):
+        return _set_bounds(bl, t, index_name=index_name,
+                           low_profile_name=low_profile_name, up_profile_name=up_profile_name)
 
     m.del_component(flow_name)
-    m.add_component(flow_name, Var(m.time, initialize=_init_input, bounds=_set_bounds))
+    m.add_component(flow_name, Var(m.time, initialize=0, within=Reals, bounds=_bounds))
 
-    m.add_component(flow_name, Param(m.time, bounds=lambda bl, t: _set_bounds(bl, t,
-                                                                              index_name=index_name,
-                                                                              low_profile_name=low_profile_name,
-                                                                              up_profile_name=up_profile_name)))
+    bounds = dict(getattr(m, '_bounds', {}))
+    bounds[flow_name] = (index_name, low_profile_name, up_profile_name)
+    m._bounds = bounds
+
+
+def apply_bound_profile(m, flow_name='flow', profile_index=None, low_profile=None, up_profile=None):
+    """
+    Applies the bounds of a variable created by :func:`bound_profile`, in place.
+
+    Both profiles are interpolated once over the whole time set, then bounds are set with one pass of setlb/setub.
+    New profiles may be given. With profile_index, both low_profile and up_profile are required, otherwise new
+    values are given for the current (sorted) index.
+
+    :param m: Block
+    :param str flow_name: name of the bounded variable, as given to :func:`bound_profile`
+    :param profile_index: new profile index (array-like, optional)
+    :param low_profile: new lower bound profile (array-like, optional)
+    :param up_profile: new upper bound profile (array-like, optional)
+    :return: None
+    """
+
+    if flow_name not in getattr(m, '_bounds', {}):
+        raise KeyError(f'{m} has no bounds associated with {flow_name}. Bounds should be declared using '
+                       f'bound_profile.')
+
+    index_name, low_profile_name, up_profile_name = m._bounds[flow_name]
+
+    if profile_index is not None:
+        if low_profile is None or up_profile is None:
+            raise ValueError('Both low_profile and up_profile are required with a new profile_index.')
+        xp = np.asarray(profile_index, dtype=float)
+        order = np.argsort(xp, kind='mergesort')
+        index = m.component(index_name)
+        index.clear()
+        index.add(*xp[order].tolist())
+    else:
+        _, xp, _, _ = _cached_profile(m, index_name=index_name, profile_name=low_profile_name, check=True)
+        order = np.arange(len(xp))
+
+    times = list(m.time)
+    stamp = _time_stamp(m, full=True)
+    for profile_name, fp in ((low_profile_name, low_profile), (up_profile_name, up_profile)):
+        if fp is None:
+            continue
+        fp = np.asarray(fp, dtype=float)
+        if fp.shape != xp.shape:
+            raise ValueError(f'{profile_name} should have the shape of the profile index, {xp.shape}, '
+                             f'but is actually {fp.shape}.')
+        xs, fs = xp[order], fp[order]
+        profile = m.component(profile_name)
+        profile.clear()
+        profile.store_values(dict(zip(xs.tolist(), fs.tolist())))
+        values = dict(zip(times, _interp(times, xs, fs).tolist()))
+        _get_profile_cache(m)[index_name, profile_name] = (stamp, xs, fs, values)
+
+    low = interp_profile(m, index_name=index_name, profile_name=low_profile_name)
+    up  = interp_profile(m, index_name=index_name, profile_name=up_profile_name)
+
+    var = m.component(flow_name)
+    for t in times:
+        v = var[t]
+        v.setlb(low[t])
+        v.setub(up[t])
 
 
 class AbsFixedFlowSource(AbsFlowSource):
@@ -258,13 +550,14 @@ class AbsFixedFlowSource(AbsFlowSource):
     Abstract Fixed Flow Source Unit.
 
     Abstract Source Unit who's flow variable is fixed using a given index set and indexed profile.
+    If array is True, the flow is an array-backed ProfileParam, see :func:`fix_profile`.
     """
 
-    def __init__(self, *args, flow_name='flow', **kwargs):
+    def __init__(self, *args, flow_name='flow', array=False, **kwargs):
 
         super().__init__(*args, flow_name = flow_name, **kwargs)
 
-        fix_profile(self, flow_name=flow_name, index_name='profile_index', profile_name='profile_value')
+        fix_profile(self, flow_name=flow_name, index_name='profile_index', profile_name='profile_value', array=array)
 
 
 class AbsFixedFlowLoad(AbsFlowLoad):
@@ -272,12 +565,13 @@ class AbsFixedFlowLoad(AbsFlowLoad):
     Abstract Fixed Flow Load Unit.
 
     Flow variable is fixed using a given index set and indexed profile.
+    If array is True, the flow is an array-backed ProfileParam, see :func:`fix_profile`.
     """
 
-    def __init__(self, *args, flow_name='flow', **kwargs):
+    def __init__(self, *args, flow_name='flow', array=False, **kwargs):
         super().__init__(*args, flow_name=flow_name, **kwargs)
 
         def _rule(m, t):
             return 0
 
-        fix_profile(self, flow_name=flow_name, index_name='profile_index', profile_name='profile_value')
+        fix_profile(self, flow_name=flow_name, index_name='profile_index', profile_name='profile_value', array=array)
@@ -11,14 +11,18 @@ class AbsBatteryV0(AbsDynUnit):
 
     This battery is limited in power, variation of power and energy. One can fix initial and final stored energy.
     (Source convention)
+
+    In compact mode, limits of energy and power are expressed as variable bounds, and only the energy balance
+    and the initial and final states are declared as constraints. In both modes, a limit set to None is ignored.
     """
 
-    def __init__(self, *args, **kwds):
+    def __init__(self, *args, compact=False, **kwds):
+        """
 
-        super().__init__(*args, **kwds)
+        :param bool compact: express energy and power limits as variable bounds instead of constraints
+        """
 
-        self.p      = Var(self.time, doc='energy derivative with respect to time',  initialize=0)
-        self.e      = Var(self.time, doc='energy in battery',                       initialize=0)
+        super().__init__(*args, **kwds)
 
         self.emin   = Param(default=0,       doc='minimum energy (kWh)',       mutable=True, within=NonNegativeReals)
         self.emax   = Param(default=UB,      doc='maximal energy',             mutable=True)
@@ -32,11 +36,34 @@ class AbsBatteryV0(AbsDynUnit):
         self.pcmax  = Param(default=UB,      doc='maximal charging power',     mutable=True, within=PositiveReals)
         self.pdmax  = Param(default=UB,      doc='maximal discharging power',  mutable=True, within=PositiveReals)
 
+        def _p_bounds(m, t):
+            return (None if m.pdmax.value is None else -m.pdmax,
+                    None if m.pcmax.value is None else m.pcmax)
+
+        def _e_bounds(m, t):
+            return (None if m.emin.value is None else m.emin,
+                    None if m.emax.value is None else m.emax)
+
+        def _dp_bounds(m, t):
+            return (None if m.dpcmax.value is None else -m.dpcmax,
+                    None if m.dpdmax.value is None else m.dpdmax)
+
+        def _e_init(m, t):
+            return 0 if m.emin.value is None else m.emin.value
+
+        if compact:
+            self.p  = Var(self.time, doc='energy derivative with respect to time',  initialize=0, bounds=_p_bounds)
+            self.e  = Var(self.time, doc='energy in battery',                       initialize=_e_init,
+                          bounds=_e_bounds)
+        else:
+            self.p  = Var(self.time, doc='energy derivative with respect to time',  initialize=0)
+            self.e  = Var(self.time, doc='energy in battery',                       initialize=_e_init)
+
         self.de     = DerivativeVar(self.e, wrt=self.time, initialize=0,
                                     doc='variation of energy  with respect to time')
         self.dp     = DerivativeVar(self.p, wrt=self.time, initialize=0,
                                     doc='variation of the battery power with respect to time',
-                                    bounds=lambda m, t: (-m.dpcmax, m.dpdmax))
+                                    bounds=_dp_bounds)
 
         self.outlet = Port(initialize={'f': (self.p, Port.Conservative)})
 
@@ -70,10 +97,10 @@ class AbsBatteryV0(AbsDynUnit):
             return m.e[t] <= m.emax
 
         def _pmax(m, t):
-            if m.pcmax.value is None:
+            lb, ub = _p_bounds(m, t)
+            if lb is None and ub is None:
                 return Constraint.Skip
-            else:
-                return -m.pdmax, m.p[t], m.pcmax
+            return lb, m.p[t], ub
 
         def _dpcmax(m, t):
             if m.dpcmax.value is None:
@@ -94,8 +121,110 @@ class AbsBatteryV0(AbsDynUnit):
         #self._p_init    = Constraint(self.time, rule=_p_init,    doc='Initialize power')
         self._e_initial = Constraint(self.time, rule=_e_initial, doc='Initial energy constraint')
         self._e_final   = Constraint(self.time, rule=_e_final,   doc='Final stored energy constraint')
-        self._e_min     = Constraint(self.time, rule=_e_min,     doc='Minimal energy constraint')
-        self._e_max     = Constraint(self.time, rule=_e_max,     doc='Maximal energy constraint')
-        self._pmax      = Constraint(self.time, rule=_pmax,      doc='Power bounds constraint')
-        self._dpdmax    = Constraint(self.time, rule=_dpdmax,    doc='Maximal varation of descharging power constraint')
-        self._dpcmax    = Constraint(self.time, rule=_dpcmax,    doc='Maximal varation of charging power constraint')
+
+        if not compact:
+            self._e_min     = Constraint(self.time, rule=_e_min,     doc='Minimal energy constraint')
+            self._e_max     = Constraint(self.time, rule=_e_max,     doc='Maximal energy constraint')
+            self._pmax      = Constraint(self.time, rule=_pmax,      doc='Power bounds constraint')
+            self._dpdmax    = Constraint(self.time, rule=_dpdmax,
+                                         doc='Maximal varation of descharging power constraint')
+            self._dpcmax    = Constraint(self.time, rule=_dpcmax,
+                                         doc='Maximal varation of charging power constraint')
+
+
+class AbsBatteryFleet(AbsDynUnit):
+    """
+    Fleet of batteries with ideal efficiency.
+
+    Compact alternative to one AbsBatteryV0 per battery : parameters are indexed by battery and variables by
+    (battery, time), on the time set of the fleet, so that the fleet is discretized once. Limits of energy, power and
+    variation of power are expressed as variable bounds. The power of the fleet is the sum of the powers of the
+    batteries. (Source convention)
+
+    Data of the fleet can be built with :func:`fleet_data`.
+    """
+
+    def __init__(self, *args, **kwds):
+        super().__init__(*args, **kwds)
+
+        self.batteries = Set(dimen=1, doc='batteries of the fleet')
+
+        self.emin   = Param(self.batteries, default=0,    doc='minimum energy (kWh)',      mutable=True,
+                            within=NonNegativeReals)
+        self.emax   = Param(self.batteries, default=UB,   doc='maximal energy',            mutable=True)
+        self.e0     = Param(self.batteries, default=None, doc='initial state',             mutable=True)
+        self.ef     = Param(self.batteries, default=None, doc='final state',               mutable=True)
+        self.dpdmax = Param(self.batteries, default=UB,   doc='maximal discharging power', mutable=True)
+        self.dpcmax = Param(self.batteries, default=UB,   doc='maximal charging power',    mutable=True)
+        self.pcmax  = Param(self.batteries, default=UB,   doc='maximal charging power',    mutable=True,
+                            within=PositiveReals)
+        self.pdmax  = Param(self.batteries, default=UB,   doc='maximal discharging power', mutable=True,
+                            within=PositiveReals)
+
+        def _pb_bounds(m, b, t):
+            return -m.pdmax[b], m.pcmax[b]
+
+        def _e_bounds(m, b, t):
+            return m.emin[b], m.emax[b]
+
+        def _dp_bounds(m, b, t):
+            return -m.dpcmax[b], m.dpdmax[b]
+
+        self.p      = Var(self.time, doc='power of the fleet', initialize=0)
+        self.pb     = Var(self.batteries, self.time, doc='energy derivative with respect to time', initialize=0,
+                          bounds=_pb_bounds)
+        self.e      = Var(self.batteries, self.time, doc='energy in battery', initialize=0, bounds=_e_bounds)
+
+        self.de     = DerivativeVar(self.e, wrt=self.time, initialize=0,
+                                    doc='variation of energy  with respect to time')
+        self.dp     = DerivativeVar(self.pb, wrt=self.time, initialize=0,
+                                    doc='variation of the battery power with respect to time',
+                                    bounds=_dp_bounds)
+
+        self.outlet = Port(initialize={'f': (self.p, Port.Conservative)})
+
+        def _e_initial(m, b, t):
+            if m.e0[b].value is not None and t == m.time.first():
+                return m.e[b, t] == m.e0[b]
+            return Constraint.Skip
+
+        def _e_final(m, b, t):
+            if m.ef[b].value is not None and t == m.time.last():
+                return m.ef[b]-1e-5, m.e[b, t], m.ef[b]+1e-5
+            return Constraint.Skip
+
+        def _energy_balance(m, b, t):
+            return m.de[b, t] == 1/3600*(m.pb[b, t])
+
+        def _p_total(m, t):
+            return m.p[t] == quicksum(m.pb[b, t] for b in m.batteries)
+
+        self._e_balance = Constraint(self.batteries, self.time, rule=_energy_balance, doc='Energy balance constraint')
+        self._e_initial = Constraint(self.batteries, self.time, rule=_e_initial, doc='Initial energy constraint')
+        self._e_final   = Constraint(self.batteries, self.time, rule=_e_final,   doc='Final stored energy constraint')
+        self._p_total   = Constraint(self.time, rule=_p_total, doc='Power of the fleet')
+
+
+def fleet_data(names, **arrays):
+    """
+    Data of an AbsBatteryFleet, from arrays of parameters.
+
+    >>> fleet_data(['b1', 'b2'], emax=[10, 5], pcmax=[3, 2])
+
+    :param names: names of the batteries
+    :param arrays: parameters of the fleet (emin, emax, e0, ef, pcmax, pdmax, dpcmax, dpdmax), as arrays of the same
+    length as names, or scalars shared by all batteries
+    :return: dict of data
+    """
+    names = list(names)
+    data = {'batteries': {None: names}}
+    for key, values in arrays.items():
+        if values is None:
+            continue
+        if isinstance(values, (int, float)):
+            values = [values]*len(names)
+        values = list(values)
+        if len(values) != len(names):
+            raise ValueError(f'{key} has {len(values)} values, while the fleet has {len(names)} batteries.')
+        data[key] = {b: float(v) for b, v in zip(names, values) if v is not None}
+    return data
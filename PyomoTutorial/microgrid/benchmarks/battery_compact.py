@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Compact battery benchmark
+
+Compares the size, construction time and solve time of the reference microgrid model using AbsBatteryV0 and
+AbsBatteryV0(compact=True), at 1 minute resolution over a week.
+
+Usage (from the microgrid directory)::
+
+    python benchmarks/battery_compact.py --days 7 --step 60 --solver glpk
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_units import refresh_profiles
+from models import microgrid_model, microgrid_data
+from pyomo.environ import SolverFactory, TransformationFactory, Constraint, Var, value
+from pyomo.core.expr.visitor import identify_variables
+from timeit import default_timer
+
+import argparse
+import numpy as np
+import pandas as pd
+
+
+def profiles(days, step):
+    """ Synthetic PV and load profiles over several days, indexed by time in seconds."""
+
+    t    = np.arange(0, days * 24*3600 + step, step, dtype=float)
+    hour = (t % (24*3600)) / 3600
+    pv   = 10 * np.clip(np.sin(np.pi * (hour - 6) / 12), 0, None)
+    load = 5 + 2 * np.sin(2 * np.pi * (hour - 8) / 24)
+
+    return pd.DataFrame({'P_pv': pv.round(4), 'P_load_1': load.round(4)}, index=t)
+
+
+def size(inst):
+    """ Number of variables, constraints and nonzeros of an instance."""
+
+    rows = list(inst.component_data_objects(Constraint, active=True))
+    return {'variables':   len(list(inst.component_data_objects(Var))),
+            'constraints': len(rows),
+            'nonzeros':    sum(len(list(identify_variables(c.body, include_fixed=False))) for c in rows)}
+
+
+def run(days, step, solver, compact):
+    df = profiles(days, step)
+
+    tic  = default_timer()
+    inst = microgrid_model(horizon=df.index[-1], compact=compact).create_instance(microgrid_data(df, battery={}))
+    TransformationFactory('dae.finite_difference').apply_to(inst, nfe=len(df) - 1)
+    refresh_profiles(inst)
+    build = default_timer() - tic
+
+    tic = default_timer()
+    SolverFactory(solver).solve(inst, load_solutions=True)
+    solve = default_timer() - tic
+
+    return dict(size(inst), **{'build (s)': build, 'solve (s)': solve, 'objective': value(inst.obj)})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--days',   type=int,   default=7)
+    parser.add_argument('--step',   type=float, default=60, help='time step in seconds')
+    parser.add_argument('--solver', default='glpk')
+    args = parser.parse_args()
+
+    res = pd.DataFrame({'AbsBatteryV0':                 run(args.days, args.step, args.solver, False),
+                        'AbsBatteryV0(compact=True)':   run(args.days, args.step, args.solver, True)})
+    print(res.to_string())
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent solver benchmark
+
+Compares the file based solve path (`SolverFactory(solver).solve(inst)`) with :class:`solvers.PersistentSolver`
+on a 96-step day (15 minutes time step) of the reference microgrid model, solved 365 times with new profiles.
+
+Usage (from the microgrid directory)::
+
+    python benchmarks/persistent_solve.py --days 365 --file-solver glpk --persistent-solver appsi_highs
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_units import set_profile, refresh_profiles
+from models import microgrid_model, microgrid_data
+from solvers import PersistentSolver
+from pyomo.environ import SolverFactory, TransformationFactory, value
+from timeit import default_timer
+
+import argparse
+import numpy as np
+import pandas as pd
+
+H   = 24*3600
+NFE = 96
+
+
+def daily_profiles(days, nfe=NFE, seed=0):
+    """ Synthetic PV and load profiles, one row per day."""
+
+    rng   = np.random.RandomState(seed)
+    t     = np.linspace(0, H, nfe + 1)
+    pv    = np.clip(np.sin(np.pi * (t - 6*3600) / (12*3600)), 0, None)
+    load  = 5 + 2 * np.sin(2 * np.pi * (t - 8*3600) / H)
+
+    pvs   = 10 * pv * rng.uniform(0.2, 1.0, size=(days, 1))
+    loads = load * rng.uniform(0.8, 1.2, size=(days, 1)) + rng.normal(0, 0.2, size=(days, nfe + 1))
+
+    return t, pvs.round(4), loads.round(4)
+
+
+def build(t, pv, load):
+    df   = pd.DataFrame({'P_pv': pv, 'P_load_1': load}, index=t)
+    inst = microgrid_model(horizon=H).create_instance(microgrid_data(df, battery={}))
+    TransformationFactory('dae.finite_difference').apply_to(inst, nfe=NFE)
+    refresh_profiles(inst)
+    return inst
+
+
+def run(days, file_solver, persistent_solver):
+    t, pvs, loads = daily_profiles(days)
+
+    inst = build(t, pvs[0], loads[0])
+    opt = SolverFactory(file_solver)
+    tic = default_timer()
+    file_obj = []
+    for d in range(days):
+        set_profile(inst.s, 'p', t, pvs[d])
+        set_profile(inst.l, 'p', t, loads[d])
+        opt.solve(inst, load_solutions=True)
+        file_obj.append(value(inst.obj))
+    file_time = default_timer() - tic
+
+    inst = build(t, pvs[0], loads[0])
+    tic = default_timer()
+    solver = PersistentSolver(inst, solver=persistent_solver)
+    solver.solve()
+    pers_obj = [value(inst.obj)]
+    for d in range(1, days):
+        set_profile(inst.s, 'p', t, pvs[d])
+        set_profile(inst.l, 'p', t, loads[d])
+        solver.resolve()
+        pers_obj.append(value(inst.obj))
+    pers_time = default_timer() - tic
+
+    return pd.DataFrame({'total (s)':     [file_time, pers_time],
+                         'per solve (ms)': [1e3 * file_time / days, 1e3 * pers_time / days],
+                         'max |obj diff|': [0.0, float(np.max(np.abs(np.subtract(file_obj, pers_obj))))]},
+                        index=[f'file ({file_solver})', f'persistent ({persistent_solver})'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--days',               type=int, default=365)
+    parser.add_argument('--file-solver',        default='glpk')
+    parser.add_argument('--persistent-solver',  default='appsi_highs')
+    args = parser.parse_args()
+
+    print(run(args.days, args.file_solver, args.persistent_solver).to_string())
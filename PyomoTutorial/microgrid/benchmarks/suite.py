@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite
+
+Builds synthetic microgrids from the unit library (main grid, batteries, fixed and scalable sources, fixed loads and
+programmable loads), for several horizons, time steps, numbers of units and LP / MILP variants, and records the
+build, discretization, write and solve times, and the size of each model. Results can be saved as a baseline, and
+compared to a previous one. Each case is run several times, and the minimum of each time is kept.
+
+Usage (from the microgrid directory)::
+
+    python benchmarks/suite.py --days 1 7 --step 900 300 --units 1 5 --variants lp milp --save baseline.json
+    python benchmarks/suite.py --days 1 7 --step 900 300 --units 1 5 --variants lp milp --compare baseline.json
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from base_units import refresh_profiles
+from batteries import AbsBatteryV0
+from maingrids import AbsMainGridV0, AbsMainGridV1
+from sources import AbsFixedPowerSource, AbsFixedPowerLoad, AbsScalablePowerSource, AbsProgrammableLoadFleet
+from profiling import PhaseProfiler, model_size
+from pyomo.environ import AbstractModel, Objective, SolverFactory, TransformationFactory, value
+from pyomo.dae import ContinuousSet, Integral
+
+import argparse
+import itertools
+import json
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+def synthetic_model(units=1, milp=False, horizon=24*3600):
+    """
+    Synthetic microgrid: one main grid, one scalable source, and 'units' fixed sources, fixed loads and batteries.
+    The MILP variant uses AbsMainGridV1 and a fleet of 'units' programmable loads, the LP one AbsMainGridV0.
+    Energy from the main grid costs 0.12 euros/kWh in both variants, so that their objectives can be compared.
+
+    :param int units: number of units of each kind
+    :param bool milp: MILP variant
+    :param horizon: time horizon in seconds
+    :return: AbstractModel
+    """
+
+    m = AbstractModel(doc='Synthetic microgrid')
+    m.time = ContinuousSet(initialize=(0, horizon))
+
+    m.mg = AbsMainGridV1() if milp else AbsMainGridV0()
+    m.sc = AbsScalablePowerSource()
+    for i in range(units):
+        m.add_component(f's{i}', AbsFixedPowerSource())
+        m.add_component(f'l{i}', AbsFixedPowerLoad())
+        m.add_component(f'b{i}', AbsBatteryV0())
+    if milp:
+        m.pl = AbsProgrammableLoadFleet()
+
+    @m.Constraint(m.time)
+    def power_balance(m, t):
+        sources = m.mg.p[t] + m.sc.p_scaled[t] + sum(m.component(f's{i}').p[t] for i in range(units))
+        loads   = sum(m.component(f'l{i}').p[t] + m.component(f'b{i}').p[t] for i in range(units))
+        if milp:
+            loads += m.pl.p[t]
+        return sources == loads
+
+    m.int = Integral(m.time, wrt=m.time, rule=lambda m, i: m.mg.inst_cost[i])
+    m.obj = Objective(expr=m.int)
+
+    return m
+
+
+def synthetic_data(units=1, milp=False, days=1, step=900, seed=0):
+    """
+    Data of :func:`synthetic_model`, with randomly shifted and scaled PV and load profiles. The data of each block
+    is indexed by None, as Pyomo expects for scalar blocks.
+
+    :return: dict
+    """
+
+    rng  = np.random.RandomState(seed)
+    t    = np.arange(0, days * 24*3600 + step, step, dtype=float)
+    hour = (t % (24*3600)) / 3600
+    time = {None: [t[0], t[-1]]}
+
+    def profile(kind):
+        if kind == 'pv':
+            v = rng.uniform(5, 15) * np.clip(np.sin(np.pi * (hour - 6 - rng.uniform(-1, 1)) / 12), 0, None)
+        else:
+            v = rng.uniform(3, 7) + 2 * np.sin(2 * np.pi * (hour - rng.uniform(6, 10)) / 24)
+        return {'time': time, 'profile_index': {None: t.tolist()}, 'profile_value': dict(zip(t.tolist(), v.round(4)))}
+
+    pmax = 30 * (units + 1)
+    mg   = {'time': time, 'pmax': {None: pmax}, 'pmin': {None: pmax}}
+    if milp:
+        mg.update({'cost_out': {None: 0.12}, 'cost_in': {None: 0.05}})
+    else:
+        mg['cost'] = {None: 0.12}
+    data = dict(time=time, mg={None: mg}, sc={None: profile('pv')})
+
+    for i in range(units):
+        data[f's{i}'] = {None: profile('pv')}
+        data[f'l{i}'] = {None: profile('load')}
+        data[f'b{i}'] = {None: {'time': time, 'e0': {None: 50}, 'ef': {None: 50}, 'emin': {None: 10},
+                                'emax': {None: 100}, 'pcmax': {None: 20.}, 'pdmax': {None: 20.}, 'dpcmax': {None: 20},
+                                'dpdmax': {None: 20}}}
+
+    if milp:
+        names = [f'a{i}' for i in range(units)]
+        w1    = {a: float(8*3600 + rng.randint(0, 4) * 3600) for a in names}
+        data['pl'] = {None: {
+            'time': time, 'appliances': {None: names}, 'w1': w1, 'w2': {a: w1[a] + 8*3600 for a in names},
+            'profile_index': {None: [(a, tau) for a in names for tau in (0., 3600., 7200.)]},
+            'profile_value': {(a, tau): v for a in names for tau, v in ((0., 2.), (3600., 2.), (7200., 0.))}}}
+
+    return {None: data}
+
+
+def run(days, step, units, milp, solver=None, seed=0, repeat=1):
+    """
+    Builds, discretizes, writes and solves one synthetic microgrid, 'repeat' times, keeping the minimum of each time.
+
+    :return: dict of times (s) and sizes
+    """
+
+    runs = [_run(days, step, units, milp, solver, seed) for _ in range(repeat)]
+    res  = runs[0]
+    for key in res:
+        if key.endswith('(s)'):
+            res[key] = min(r[key] for r in runs)
+    return res
+
+
+def _run(days, step, units, milp, solver=None, seed=0):
+
+    prof = PhaseProfiler()
+    nfe  = int(round(days * 24*3600 / step))
+
+    with prof.phase('build'):
+        inst = synthetic_model(units, milp, days * 24*3600).create_instance(
+            synthetic_data(units, milp, days, step, seed))
+    constructed = model_size(inst)
+
+    with prof.phase('discretize'):
+        TransformationFactory('dae.finite_difference').apply_to(inst, nfe=nfe)
+        refresh_profiles(inst)
+        inst.sc.scale_fact.setub(2)
+        if milp:
+            inst.pl.compile()
+    discretized = model_size(inst)
+
+    with tempfile.TemporaryDirectory() as tmp, prof.phase('write'):
+        inst.write(os.path.join(tmp, 'model.lp'), io_options={'symbolic_solver_labels': False})
+
+    objective = None
+    if solver is not None:
+        with prof.phase('solve'):
+            SolverFactory(solver).solve(inst, load_solutions=True)
+        objective = value(inst.obj)
+
+    res = {'days': days, 'step': step, 'units': units, 'variant': 'milp' if milp else 'lp'}
+    res.update({f"{p['phase']} (s)": p['time'] for p in prof.phases})
+    res.update({f'constructed {k}': v for k, v in constructed.items()})
+    res.update(discretized)
+    res['objective'] = objective
+    return res
+
+
+def case(res):
+    return f"{res['variant']}-{res['units']}u-{res['days']}d-{int(res['step'])}s"
+
+
+def compare(results, baseline, threshold=1.2):
+    """
+    Ratios of the times of the results to the ones of a baseline, for the cases of both.
+
+    :param DataFrame results: results, indexed by case
+    :param DataFrame baseline: baseline, indexed by case
+    :param float threshold: ratio above which a time is flagged as a regression
+    :return: DataFrame of ratios, with a 'regression' column
+    """
+
+    cols  = [c for c in results.columns if c.endswith('(s)') and c in baseline.columns]
+    cases = results.index.intersection(baseline.index)
+    ratio = results.loc[cases, cols] / baseline.loc[cases, cols]
+    ratio['regression'] = (ratio > threshold).any(axis=1)
+    return ratio
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[1])
+    parser.add_argument('--days',      type=int,   nargs='+', default=[1])
+    parser.add_argument('--step',      type=float, nargs='+', default=[900], help='time steps in seconds')
+    parser.add_argument('--units',     type=int,   nargs='+', default=[1, 5])
+    parser.add_argument('--variants',  nargs='+',  default=['lp', 'milp'], choices=['lp', 'milp'])
+    parser.add_argument('--solver',    default=None, help='solver (models are not solved by default)')
+    parser.add_argument('--save',      default=None, help='save the results as a baseline (json)')
+    parser.add_argument('--compare',   default=None, help='compare the results to a baseline (json)')
+    parser.add_argument('--threshold', type=float, default=1.2, help='time ratio flagged as a regression')
+    parser.add_argument('--repeat',    type=int,   default=3,   help='runs of each case, the minimum time is kept')
+    args = parser.parse_args()
+
+    records = [run(d, s, u, v == 'milp', args.solver, repeat=args.repeat)
+               for v, u, d, s in itertools.product(args.variants, args.units, args.days, args.step)]
+    df = pd.DataFrame(records, index=[case(r) for r in records])
+    print(df.to_string())
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump({case(r): r for r in records}, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = pd.DataFrame.from_dict(json.load(f), orient='index')
+        ratio = compare(df, baseline, args.threshold)
+        print(ratio.to_string())
+        if ratio['regression'].any():
+            sys.exit(1)
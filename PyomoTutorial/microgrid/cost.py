@@ -4,10 +4,13 @@ Economic Units and methods
 This module contains Economic units and methods to define parameter, variables and objectives to an exiting block
 """
 
-from pyomo.environ import Param, Var, Expression, NonNegativeReals, PositiveReals, Constraint
+from pyomo.environ import Param, Var, Expression, NonNegativeReals, PositiveReals, Constraint, value
+
+import numpy as np
 
 __all__ = ['def_linear_cost', 'def_bilinear_cost','def_linear_dyn_cost',
-           'def_bilinear_dynamic_cost', 'def_absolute_cost']
+           'def_bilinear_dynamic_cost', 'def_absolute_cost', 'CompiledCost', 'compile_costs', 'cost_breakdown',
+           'quadrature_weights', 'def_quadrature_cost']
 
 
 def def_linear_cost(m, var_name='p'):
@@ -130,3 +133,207 @@ def def_bilinear_dynamic_cost(bl, var_in='p_in', var_out='p_out'):
     return Expression(bl.time, rule=_instant_cost,
                       doc=f'instantaneous bilinear and dynamic cost, associated with variable {var_in} and {var_out}')
 
+
+class CompiledCost(object):
+    """
+    Compiled evaluation of a linear Expression indexed by time, e.g. "inst_cost".
+
+    The linear structure of the expression (variable index and coefficient arrays) is extracted once, and the
+    whole series is then evaluated with one NumPy operation. Coefficients depending on mutable parameters (or fixed
+    variables) are re-evaluated automatically when their values change.
+
+    Example::
+
+        >>> cost = CompiledCost(inst.mg.inst_cost)
+        >>> cost()          # numpy array of the instantaneous cost, sorted by time
+        >>> cost.series()   # same values as a pandas Series indexed by time
+    """
+
+    def __init__(self, expression):
+        """
+
+        :param expression: linear Expression, indexed by time
+        """
+        self.expression = expression
+        self.compile()
+
+    def compile(self):
+        """
+        Extracts the linear structure of the expression.
+
+        :return: None
+        """
+        from pyomo.repn import generate_standard_repn
+        from pyomo.core.expr.visitor import identify_mutable_parameters, identify_variables
+
+        self.index  = sorted(self.expression.keys())
+        self._vars  = []
+        positions   = {}
+        rows, cols  = [], []
+        coefs, consts = [], []
+
+        for r, k in enumerate(self.index):
+            repn = generate_standard_repn(self.expression[k].expr, compute_values=False, quadratic=False)
+            if not repn.is_linear():
+                raise ValueError(f'{self.expression[k].name} is not linear and can not be compiled.')
+            for v, a in zip(repn.linear_vars, repn.linear_coefs):
+                if id(v) not in positions:
+                    positions[id(v)] = len(self._vars)
+                    self._vars.append(v)
+                rows.append(r)
+                cols.append(positions[id(v)])
+                coefs.append(a)
+            consts.append(repn.constant)
+
+        self._rows   = np.array(rows, dtype=np.intp)
+        self._cols   = np.array(cols, dtype=np.intp)
+        self._coef_exprs  = coefs
+        self._const_exprs = consts
+
+        # mutable parameters and fixed variables the coefficients depend on
+        deps = {}
+        for e in coefs + consts:
+            if type(e) in (int, float):
+                continue
+            for p in identify_mutable_parameters(e):
+                deps[id(p)] = p
+            for v in identify_variables(e, include_fixed=True):
+                deps[id(v)] = v
+        self._deps = list(deps.values())
+        self._update_coefs()
+
+    def _update_coefs(self):
+        self._coefs  = np.array([value(a) for a in self._coef_exprs],  dtype=np.float64)
+        self._consts = np.array([value(c) for c in self._const_exprs], dtype=np.float64)
+        self._values = [d.value for d in self._deps]
+
+    def __call__(self):
+        """
+        Evaluates the expression over the whole time set.
+
+        :return: numpy array, sorted by time
+        """
+        if [d.value for d in self._deps] != self._values:
+            self._update_coefs()
+
+        x = np.array([v.value for v in self._vars], dtype=np.float64)
+        return self._consts + np.bincount(self._rows, weights=self._coefs * x[self._cols],
+                                          minlength=len(self.index))
+
+    def series(self):
+        """
+        Evaluates the expression over the whole time set.
+
+        :return: Series indexed by time
+        """
+        from pandas import Series
+        return Series(self(), index=self.index, name=self.expression.name)
+
+
+def compile_costs(model, name='inst_cost'):
+    """
+    Compiles the instantaneous cost expressions of every block of a model.
+
+    :param model: Model or Block
+    :param str name: name of the cost expressions
+    :return: dict of CompiledCost, indexed by block names
+    """
+    from pyomo.environ import Block
+
+    costs = {}
+    for blk in model.component_data_objects(Block, descend_into=True):
+        expr = blk.component(name)
+        if isinstance(expr, Expression) and expr.is_indexed():
+            costs[blk.getname(fully_qualified=True, relative_to=model)] = CompiledCost(expr)
+    return costs
+
+
+def cost_breakdown(costs):
+    """
+    Instantaneous costs of several blocks, as returned by :func:`compile_costs`.
+
+    :param dict costs: dict of CompiledCost
+    :return: DataFrame indexed by time, with one column per block
+    """
+    from pandas import DataFrame
+    return DataFrame({name: c.series() for name, c in costs.items()})
+
+
+def quadrature_weights(time, scheme='trapezoid'):
+    """
+    Integration weights of the points of a (discretized) time set.
+
+    - 'trapezoid': trapezoidal rule,
+    - 'backward' and 'forward': rectangle rules, consistent with backward and forward finite differences,
+    - 'collocation': interpolatory quadrature on each finite element, using the element start point and its
+      collocation points (for a time set discretized with dae.collocation).
+
+    :param time: ContinuousSet
+    :param str scheme: 'trapezoid', 'backward', 'forward' or 'collocation'
+    :return: dict mapping each time to its weight
+    """
+
+    t = np.array(sorted(time), dtype=np.float64)
+    steps = np.diff(t)
+    w = np.zeros(len(t))
+
+    if scheme == 'trapezoid':
+        w[:-1] += steps / 2
+        w[1:]  += steps / 2
+    elif scheme == 'backward':
+        w[1:] = steps
+    elif scheme == 'forward':
+        w[:-1] = steps
+    elif scheme == 'collocation':
+        fe = np.array(sorted(time.get_finite_elements()), dtype=np.float64)
+        for a, b in zip(fe[:-1], fe[1:]):
+            nodes = np.flatnonzero((t >= a) & (t <= b))
+            x = (t[nodes] - a) / (b - a)
+            p = np.arange(len(x))
+            # moments of the monomials over [0, 1], solved for the weights of the nodes
+            w[nodes] += (b - a) * np.linalg.solve(x[np.newaxis, :] ** p[:, np.newaxis], 1. / (p + 1))
+    else:
+        raise ValueError(f"scheme should be 'trapezoid', 'backward', 'forward' or 'collocation', "
+                         f"but is actually {scheme}.")
+
+    return dict(zip(sorted(time), w.tolist()))
+
+
+def def_quadrature_cost(model, name='inst_cost', scheme='trapezoid', keep_unit_costs=False):
+    """
+    Total cost of a model, as a flat weighted sum of the instantaneous costs of its blocks.
+
+    It replaces `Integral(m.time, wrt=m.time, rule=lambda m, i: m.mg.inst_cost[i])` once the model is discretized:
+    every block holding an expression "name" contributes its instantaneous cost, weighted by the quadrature
+    weights of its time set, to one flat sum.
+
+    Example::
+
+        >>> TransformationFactory('dae.finite_difference').apply_to(inst, nfe=nfe)
+        >>> inst.obj = Objective(expr=def_quadrature_cost(inst))
+
+    :param model: discretized Model or Block
+    :param str name: name of the instantaneous cost expressions
+    :param str scheme: quadrature scheme, see :func:`quadrature_weights`
+    :param bool keep_unit_costs: add a scalar expression "total_cost" to each block, for reporting purpose
+    :return: pyomo expression of the total cost
+    """
+    from pyomo.environ import Block, quicksum
+
+    terms = []
+    for blk in model.component_data_objects(Block, descend_into=True):
+        cost = blk.component(name)
+        if not isinstance(cost, Expression) or not cost.is_indexed():
+            continue
+
+        weights = quadrature_weights(cost.index_set(), scheme=scheme)
+        unit_terms = [weights[t] * cost[t] for t in cost.index_set() if weights[t] != 0]
+
+        if keep_unit_costs:
+            blk.total_cost = Expression(expr=quicksum(unit_terms, linear=False),
+                                        doc=f'total cost of the block, {scheme} quadrature of {name} (euros)')
+            terms.append(blk.total_cost)
+        else:
+            terms.extend(unit_terms)
+
+    return quicksum(terms, linear=False)
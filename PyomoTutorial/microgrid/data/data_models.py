@@ -1,6 +1,8 @@
 import pandas as pd
 import os
 
+from data.tools import ProfileStore
+
 wd = os.getcwd()
 path=os.path.join(wd, 'data/prediction.csv')
 usecols=['Date and time (UTC)', 'Pmax', 'T1', 'TGBT']
@@ -16,15 +18,16 @@ df = df.loc[TSTART:TEND]
 df = df.round(decimals=4)
 
 df.rename(columns={'TGBT': 'P_load', 'T1': 'P_load_1'}, inplace=True)
-df['P_pv']       = df.Pmax * 100/1000
+df['P_pv']       = (df.Pmax * 100/1000).round(decimals=4)
 df.Pmax          = df.Pmax / 1000
-df.P_load        = df.P_load.apply(lambda x: round(x, 4))
-df.P_load_1      = df.P_load_1.apply(lambda x: round(x, 4))
-df.P_pv          = df.P_pv.apply(lambda x: round(x, 4))
 
 df_s = df.copy()
 df.index = (df.index - df.index[0]).total_seconds()
 
+# one float64 array per signal, shared without copy by the sources and loads declared with array=True
+# (e.g. AbsFixedPowerSource(array=True)), whose profiles are given as (time axis, signal)
+store = ProfileStore.from_frame(df, columns=['P_pv', 'P_load', 'P_load_1'])
+
 data_batt = {
         'time':   {None: [df.index[0], df.index[-1]]},
         'dpcmax': {None: 20},
@@ -40,19 +43,17 @@ data_mg = {
     'time': {None: [df.index[0], df.index[-1]]},
     'pmax': {None: 30},
     'pmin': {None: 30},
-    'cost': {None: 0.12/3600}
+    'cost': {None: 0.12}   # euros/kWh
 }
 
 data_s = {
     'time': {None: [df.index[0], df.index[-1]]},
-    'profile_index': {None: df.index},
-    'profile_value': df['P_pv'].to_dict()
+    'p':    (store.index, store['P_pv'])
 }
 
 data_l = {
     'time': {None: [df.index[0], df.index[-1]]},
-    'profile_index': {None: df.index},
-    'profile_value': df['P_load_1'].to_dict()}
+    'p':    (store.index, store['P_load_1'])}
 
 data = {None: dict(time     = {None: [df.index[0], df.index[-1]]},
                 b           = data_batt,
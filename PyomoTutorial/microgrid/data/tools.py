@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 import logging
+import json
+import os
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,14 @@ class Horizon(object):
     def previous(self, value):
         raise NotImplementedError('NotImplemented, user can not set the previous horizon himself.')
 
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        raise NotImplementedError('NotImplemented, user can not set the status of the horizon himself.')
+
     def next(self):
 
         if self._status == _STATUS[2]:
@@ -129,55 +139,395 @@ class Horizon(object):
                     f'repeat every = {self.repeat_every}')
 
 
+    def adaptive_grid(self, df, columns=None, tol=0.01, max_step=None):
+        """
+        Adaptive non-uniform time grid of the current horizon, see :func:`adaptive_grid`.
+
+        :param DataFrame df: profiles of the current horizon, indexed by horizon.current
+        :param columns: columns of the profiles driving the grid (all by default)
+        :param float tol: maximal interpolation error, relative to the range of each profile
+        :param max_step: maximal time step (string or pandas Timedelta, optional)
+        :return: points (in seconds from the beginning of the horizon) and integration weights
+        """
+        columns = list(df.columns) if columns is None else columns
+        index   = (df.index - self.tstart).total_seconds()
+        return adaptive_grid(index, *[df[c].to_numpy(dtype=float) for c in columns], tol=tol,
+                             max_step=None if max_step is None else pd.Timedelta(max_step).total_seconds())
+
+
+def adaptive_grid(index, *profiles, tol=0.01, max_step=None):
+    """
+    Adaptive non-uniform time grid.
+
+    Points of index are kept only where profiles need them: a point is dropped when the linear interpolation between
+    the kept points stays within tol of every profile, relatively to the range of the profile. Steps are thus fine
+    where profiles change quickly, and coarse at night or on flat load.
+
+    The points may be used to initialize the time ContinuousSets of a model (e.g. `{'time': {None: points}}` in the
+    data of each unit). Applying `dae.finite_difference` with `nfe=len(points) - 1` then keeps the grid unchanged.
+    Weights are the trapezoidal integration weights of the points.
+
+    Example::
+
+        >>> points, weights = adaptive_grid(df.index, df['P_pv'], df['P_load_1'], tol=0.02, max_step=3600)
+        >>> nfe = len(points) - 1
+
+    :param index: increasing time index, in seconds
+    :param profiles: profiles, of the same length as index
+    :param float tol: maximal interpolation error, relative to the range of each profile
+    :param float max_step: maximal time step, in seconds (optional)
+    :return: points and integration weights, as numpy arrays
+    """
+
+    t = np.asarray(index, dtype=float)
+    y = np.atleast_2d(np.asarray(profiles, dtype=float)) if profiles else np.zeros((1, len(t)))
+    n = len(t)
+
+    scale = np.ptp(y, axis=1)
+    scale[scale == 0] = 1.
+    y = y / scale[:, np.newaxis]
+
+    kept = [0]
+    i = 0
+    while i < n - 1:
+        j = i + 1
+        while j + 1 < n:
+            k = j + 1
+            if max_step is not None and t[k] - t[i] > max_step:
+                break
+            w = (t[i:k + 1] - t[i]) / (t[k] - t[i])
+            lin = y[:, i, np.newaxis] + w * (y[:, k] - y[:, i])[:, np.newaxis]
+            if np.max(np.abs(y[:, i:k + 1] - lin)) > tol:
+                break
+            j = k
+        kept.append(j)
+        i = j
+
+    points = t[kept]
+    steps = np.diff(points)
+    weights = np.zeros(len(points))
+    weights[:-1] += steps / 2
+    weights[1:]  += steps / 2
+
+    logger.info(f'Adaptive grid of {len(points) - 1} finite elements, instead of {n - 1}.')
+    return points, weights
+
+
+class PredictionSource(object):
+
+    def __init__(self, path, usecols=None, tz_data='UTC', fillnan=False, filldict=None, cache_path=None):
+        """
+        Prediction data file, parsed once and queried by horizon.
+
+        The csv file is parsed and normalized to UTC once. A binary copy is cached (by default next to the csv file,
+        with a .pkl extension) and invalidated when the modification time of the csv file changes.
+        Horizon queries are answered by a binary search on the sorted int64 index, and only the rows bracketing the
+        horizon are interpolated, so that the cost of a query scales with the length of the horizon.
+
+        :param path: csv data file
+        :param usecols: columns to be read (optional)
+        :param tz_data: time zone information of the data file ('UTC' or 'Europe/Paris')
+        :param fillnan: fill Nan values before interpolating
+        :param dict filldict: values used for filling Nan values, by column
+        :param cache_path: path of the binary cache, False for disabling it (optional)
+        """
+
+        self.path       = path
+        self.usecols    = usecols
+        self.tz_data    = tz_data
+        self.fillnan    = fillnan
+        self.filldict   = {} if filldict is None else filldict
+        self.cache_path = path + '.pkl' if cache_path is None else cache_path
+        self.mtime      = None
+        self.columns    = None
+        self._index     = None
+        self._valid     = None
+
+        self.load()
+
+    def _key(self):
+        return (self.mtime, self.usecols, self.tz_data, self.fillnan, sorted(self.filldict.items()))
+
+    def _parse(self):
+        if self.usecols is not None:
+            df = pd.read_csv(self.path, index_col=0, usecols=self.usecols, parse_dates=True, dayfirst=True)
+        else:
+            df = pd.read_csv(self.path, index_col=0, parse_dates=True, dayfirst=True)
+
+        # Nan values must be filled before interpolating, the user can use fillnan and filldict to do this
+        if self.fillnan:
+            for d in self.filldict:
+                df[d] = df[d].fillna(self.filldict[d])
+
+        if df.index.tzinfo is None:
+            df.index = df.index.tz_localize(self.tz_data).tz_convert('UTC')
+        else:
+            df.index = df.index.tz_convert('UTC')
+
+        return df.sort_index()
+
+    def load(self):
+        """
+        Loads the data from the binary cache if it is up to date, or parses the csv file otherwise.
+
+        :return: None
+        """
+
+        self.mtime = os.path.getmtime(self.path)
+
+        df = None
+        if self.cache_path and os.path.exists(self.cache_path):
+            cached = pd.read_pickle(self.cache_path)
+            if cached['key'] == self._key():
+                df = cached['data']
+                logger.debug(f'Prediction data loaded from {self.cache_path}.')
+
+        if df is None:
+            df = self._parse()
+            if self.cache_path:
+                pd.to_pickle({'key': self._key(), 'data': df}, self.cache_path)
+                logger.debug(f'Prediction data parsed from {self.path} and cached in {self.cache_path}.')
+
+        self.columns = list(df.columns)
+        self._index  = df.index.asi8
+
+        # index and values of the non-Nan rows of each column
+        self._valid = {}
+        for c in self.columns:
+            values = df[c].to_numpy(dtype=np.float64)
+            mask = ~np.isnan(values)
+            self._valid[c] = (self._index[mask], values[mask])
+
+    def is_outdated(self):
+        """ Returns True if the csv file has been modified since it was loaded."""
+        return os.path.getmtime(self.path) != self.mtime
+
+    def get(self, horizon, method='time'):
+        """
+        Synchronizes / interpolates the data to the current horizon date time index.
+
+        :param Horizon horizon: Time horizon
+        :param method: 'time' for linear interpolation, 'pad' for using the last known value
+        :return: DataFrame indexed by horizon.current
+        """
+
+        if method not in ('time', 'pad'):
+            raise ValueError(f"method should be either 'time' or 'pad', but is actually {method}.")
+
+        q = horizon.current.asi8
+
+        # be sure that the current horizon is in the data index set
+        assert q[0]  >= self._index[0],  ""
+        assert q[-1] <= self._index[-1], ""
+
+        data = {}
+        for c in self.columns:
+            x, y = self._valid[c]
+            lo = max(np.searchsorted(x, q[0], side='right') - 1, 0)
+            hi = np.searchsorted(x, q[-1], side='left') + 1
+            x, y = x[lo:hi], y[lo:hi]
+
+            if len(x) == 0:
+                data[c] = np.full(len(q), np.NaN)
+                continue
+
+            if method == 'time':
+                v = np.interp(q, x, y)
+            else:
+                pos = np.searchsorted(x, q, side='right') - 1
+                v = y[np.maximum(pos, 0)]
+            v[q < x[0]] = np.NaN
+            data[c] = v
+
+        return pd.DataFrame(data, index=horizon.current, columns=self.columns)
+
+
+_SOURCES = {}
+
+
 def get_prediction_data(horizon, path ='.csv', usecols=None, tz_data='UTC', fillnan=False, filldict = {}, method='time'):
 
     """
+    The data file is parsed once, see :class:`PredictionSource`, and following calls only query the horizon.
+
     :param Horizon horizon: Time horizon
     :param path: csv data file
     :param tz_data: time zone information ('UTC' or 'Europe/Paris')
     :return:
 
     """
-    # reading data file (all of it)
-    if usecols is not None:
-        d1 = pd.read_csv(path, index_col=0, usecols=usecols, parse_dates=True, dayfirst=True)
-    else:
-        d1 = pd.read_csv(path, index_col=0, parse_dates=True, dayfirst=True)
-
-    # Nan values must be filled before interpolating, the user can use fillnan and filldict to do this
-    if fillnan:
-        try :
-            for d in filldict:
-                d1[d] = d1[d].fillna(filldict[d])
-        except KeyError as e:
-            raise e
 
-    # convert date time index to the correct time zone
-    if d1.index.tzinfo is None :
-        d1.index = d1.index.tz_localize(tz_data).tz_convert(horizon.tz_info)
-    else:
-        d1.index = d1.index.tz_convert(horizon.tz_info)
+    key = (os.path.abspath(path), None if usecols is None else tuple(usecols), tz_data, fillnan,
+           tuple(sorted(filldict.items())))
+
+    source = _SOURCES.get(key, None)
+    if source is None:
+        source = PredictionSource(path, usecols=usecols, tz_data=tz_data, fillnan=fillnan, filldict=dict(filldict))
+        _SOURCES[key] = source
+    elif source.is_outdated():
+        source.load()
+
+    return source.get(horizon, method=method)
+
+
+class ProfileStore(object):
+
+    def __init__(self, index, columns=None, start=None, path=None):
+        """
+        NumPy-backed store of time series profiles, sharing one time axis.
+
+        Signals are stored as the rows of one contiguous float64 array, so that a signal is accessed by name as
+        a zero-copy view, e.g. `store['P_pv']`. The array may be persisted as a `np.memmap`.
+
+        :param index: time axis, in seconds (array-like)
+        :param dict columns: mapping of signal names to values (array-like of the same length as index)
+        :param start: timestamp corresponding to index 0 (optional)
+        :param path: path of the .npy file used as memory map (optional)
+        """
+
+        columns = {} if columns is None else columns
 
-    # be sure that the current horizon is in the data index set
-    assert horizon.current[0]  >= d1.index[0],  ""
-    assert horizon.current[-1] <= d1.index[-1], ""
+        self.index      = np.ascontiguousarray(index, dtype=np.float64)
+        self.start      = None if start is None else pd.Timestamp(start)
+        self.path       = path
+        self._columns   = {name: i for i, name in enumerate(columns)}
 
-    # Synchronizing / Interpolating data to the current horizon date time index
+        shape = (len(self._columns), len(self.index))
+        if path is None:
+            self._data = np.empty(shape, dtype=np.float64)
+        else:
+            self._data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=shape)
 
-    dh1 = pd.DataFrame([np.NaN]*len(horizon.current), index=horizon.current, columns=['tmp'])
+        for name, values in columns.items():
+            self._data[self._columns[name]] = values
 
-    import warnings
-    with warnings.catch_warnings():
-        # Pandas 0.24.1 emits useless warning when sorting tz-aware index
-        warnings.simplefilter("ignore")
-        if method=='time':
-            a = d1.join(dh1, how='outer').interpolate(method=method)
-        if method=='pad':
-            a = d1.join(dh1, how='outer').sort_index().fillna(method='pad')
+        if path is not None:
+            self._data.flush()
+            self._write_header(path)
 
-    del a['tmp']
+    @classmethod
+    def from_frame(cls, df, columns=None, path=None):
+        """
+        Creates a store from a DataFrame.
+
+        If the DataFrame is indexed by timestamps, the time axis is expressed in seconds from the first timestamp.
+
+        :param DataFrame df: data
+        :param list columns: columns to be stored (optional, all by default)
+        :param path: path of the .npy file used as memory map (optional)
+        :return: ProfileStore
+        """
+
+        columns = list(df.columns) if columns is None else columns
+
+        if isinstance(df.index, pd.DatetimeIndex):
+            start = df.index[0]
+            index = (df.index - start).total_seconds()
+        else:
+            start = None
+            index = df.index
+
+        return cls(np.asarray(index, dtype=np.float64),
+                   columns={c: df[c].to_numpy(dtype=np.float64) for c in columns}, start=start, path=path)
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """
+        Loads a store saved with :meth:`save`, or created with a path.
+
+        :param path: path of the .npy file
+        :param mmap_mode: memory map mode, see `np.load` (None for loading the data in memory)
+        :return: ProfileStore
+        """
 
-    # selecting only horizon period
-    data_horizon = a.loc[horizon.current]
+        with open(cls._header_path(path)) as f:
+            header = json.load(f)
 
-    return data_horizon
\ No newline at end of file
+        store = cls.__new__(cls)
+        store.index     = np.asarray(header['index'], dtype=np.float64)
+        store.start     = None if header['start'] is None else pd.Timestamp(header['start'])
+        store.path      = path
+        store._columns  = {name: i for i, name in enumerate(header['columns'])}
+        store._data     = np.load(path, mmap_mode=mmap_mode)
+
+        return store
+
+    def save(self, path):
+        """
+        Saves the store as a .npy file (that can be memory mapped) and a json header.
+
+        :param path: path of the .npy file
+        :return: None
+        """
+        np.save(path, self._data)
+        self._write_header(path)
+
+    @staticmethod
+    def _header_path(path):
+        return os.path.splitext(path)[0] + '.json'
+
+    def _write_header(self, path):
+        with open(self._header_path(path), 'w') as f:
+            json.dump({'columns': self.columns,
+                       'start':   None if self.start is None else str(self.start),
+                       'index':   self.index.tolist()}, f)
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self._columns
+
+    def __getitem__(self, name):
+        try:
+            return self._data[self._columns[name]]
+        except KeyError:
+            raise KeyError(f'{name} is not a column of the ProfileStore. Available columns are {self.columns}.')
+
+    def __setitem__(self, name, values):
+        if name in self._columns:
+            self._data[self._columns[name]] = values
+        elif isinstance(self._data, np.memmap):
+            raise KeyError(f'{name} is not a column of the ProfileStore. New columns can not be added to a '
+                           f'memory mapped ProfileStore.')
+        else:
+            self._data = np.vstack([self._data, np.asarray(values, dtype=np.float64)[np.newaxis, :]])
+            self._columns[name] = len(self._columns)
+
+    def profile_data(self, name, index_name='profile_index', profile_name='profile_value'):
+        """
+        Data of one signal, formatted for the `create_instance` method of a unit using a fixed profile.
+
+        :param name: name of the signal
+        :param index_name: name of the index set of the unit
+        :param profile_name: name of the profile parameter of the unit
+        :return: dict
+        """
+        index = self.index.tolist()
+        return {index_name:   {None: index},
+                profile_name: dict(zip(index, self[name].tolist()))}
+
+    def apply(self, block, name, flow_name='p'):
+        """
+        Sets the profile of a block, created with `fix_profile`, to one signal of the store.
+
+        If the fixed value is a ProfileParam (`fix_profile(..., array=True)`), the signal and the time axis are handed
+        to it without copy. Otherwise, they are copied into the profile Set and Param of the block.
+
+        :param block: Block
+        :param name: name of the signal
+        :param flow_name: name of the fixed value of the block
+        :return: None
+        """
+        from base_units import set_profile
+        from params import ProfileParam
+
+        comp = block.component(flow_name)
+        if isinstance(comp, ProfileParam):
+            comp.set_values(self[name], index=self.index)
+        else:
+            set_profile(block, flow_name, self.index, self[name])
@@ -10,10 +10,13 @@ from cost import def_bilinear_cost, def_linear_cost
 
 from pyomo.environ import Constraint,  Var, Param, Block, Expression, Piecewise
 from pyomo.network import Port
-from pyomo.environ import NonNegativeReals, Binary, Reals
+from pyomo.environ import NonNegativeReals, Binary, Reals, UnitInterval, value
 from pandas import Series
 
-__all__ = ['AbsMainGridV0', 'AbsMainGridV1']
+import logging
+
+__all__ = ['AbsMainGridV0', 'AbsMainGridV1', 'relax_pin_pout', 'relax_grid_binaries']
+logger = logging.getLogger('lms2.maingrids')
 
 UB = 10e6
 
@@ -57,6 +60,57 @@ def def_pin_pout(m):
     m._p_balance = Constraint(m.time, rule=_power_balance, doc='power balance')
 
 
+def relax_pin_pout(m, tol=0.):
+    """
+    Relaxes the binary variable 'u' defined by def_pin_pout, wherever it is provably useless.
+
+    The instantaneous cost (pout*cost_out - pin*cost_in) being minimized, simultaneous import and export
+    (pin > 0 and pout > 0) is never profitable when cost_in <= cost_out, i.e. when the price of 'pin' does not exceed
+    the one of 'pout'. At these time steps, the LP relaxation of 'u' is exact and 'u' is relaxed to [0, 1].
+    'u' remains binary at the other time steps. Costs can be static or dynamic (indexed by time) parameters.
+
+    It should be called on an instance, after discretization, and again if costs are modified.
+
+    :param m: Block
+    :param float tol: tolerance on the comparison of costs
+    :return: list of the time steps where 'u' remains binary
+    """
+
+    assert hasattr(m, 'u'), f"model m does not have attribute named 'u'. This is needed. "
+
+    def _cost(c, t):
+        return value(c[t]) if c.is_indexed() else value(c)
+
+    binaries = []
+    for t in m.time:
+        if _cost(m.cost_in, t) <= _cost(m.cost_out, t) + tol:
+            m.u[t].domain = UnitInterval
+        else:
+            m.u[t].domain = Binary
+            binaries.append(t)
+
+    if binaries:
+        logger.info(f'{m.name}: binary variable kept for {len(binaries)} of {len(m.time)} time steps '
+                    f'(from t={binaries[0]} to t={binaries[-1]}).')
+        logger.debug(f'{m.name}: time steps with binary variable : {binaries}')
+    else:
+        logger.info(f'{m.name}: binary variable relaxed for all time steps, the problem is an LP.')
+
+    return binaries
+
+
+def relax_grid_binaries(model, tol=0.):
+    """
+    Relaxes the binary variables of every AbsMainGridV1 of a model, see :func:`relax_pin_pout`.
+
+    :param model: Model or Block
+    :param float tol: tolerance on the comparison of costs
+    :return: dict of the time steps where binaries are kept, indexed by the names of the main grids
+    """
+    return {blk.getname(fully_qualified=True, relative_to=model): relax_pin_pout(blk, tol=tol)
+            for blk in model.component_data_objects(Block, descend_into=True) if isinstance(blk, AbsMainGridV1)}
+
+
 class AbsMainGridV0(AbsPowerSource):
     """
     Simple MainGrid Unit.
@@ -100,3 +154,12 @@ class AbsMainGridV1(AbsPowerSource):
         super().__init__(*args, flow_name=flow_name, **kwgs)
         def_pin_pout(self)
         self.inst_cost = def_bilinear_cost(self, var_in='pin', var_out='pout')
+
+    def relax_binaries(self, tol=0.):
+        """
+        Relaxes the binary variable 'u' wherever the LP relaxation is exact, see :func:`relax_pin_pout`.
+
+        :param float tol: tolerance on the comparison of costs
+        :return: list of the time steps where 'u' remains binary
+        """
+        return relax_pin_pout(self, tol=tol)
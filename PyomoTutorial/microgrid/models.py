@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Microgrid models
+
+Reference microgrid problem of the tutorial notebooks (main grid, PV source, load and battery), built from the
+unit library, and the corresponding data.
+"""
+
+from batteries import AbsBatteryV0
+from maingrids import AbsMainGridV0
+from sources import AbsFixedPowerLoad, AbsFixedPowerSource
+from pyomo.environ import AbstractModel, Objective
+from pyomo.dae import ContinuousSet, Integral
+
+__all__ = ['microgrid_model', 'microgrid_data']
+
+
+def microgrid_model(horizon=24*3600, battery=True, grid=AbsMainGridV0, compact=False):
+    """
+    Abstract microgrid model, as built in the tutorial notebooks.
+
+    :param horizon: time horizon in seconds
+    :param bool battery: add a battery (AbsBatteryV0) to the microgrid
+    :param grid: class of the main grid unit
+    :param bool compact: use the compact formulation of the battery
+    :return: AbstractModel
+    """
+
+    m = AbstractModel(doc='Microgrid model')
+    m.time = ContinuousSet(initialize=(0, horizon))
+
+    m.mg = grid()
+    m.s  = AbsFixedPowerSource()
+    m.l  = AbsFixedPowerLoad()
+    if battery:
+        m.b = AbsBatteryV0(compact=compact)
+
+    @m.Constraint(m.time)
+    def power_balance(m, t):
+        if battery:
+            return m.mg.p[t] + m.s.p[t] == m.l.p[t] + m.b.p[t]
+        return m.mg.p[t] + m.s.p[t] == m.l.p[t]
+
+    m.int = Integral(m.time, wrt=m.time, rule=lambda m, i: m.mg.inst_cost[i])
+    m.obj = Objective(expr=m.int)
+
+    return m
+
+
+def microgrid_data(df, source='P_pv', load='P_load_1', battery=None, grid=None):
+    """
+    Data of the microgrid model, see `data/data_models.py`. The data of each block is indexed by None, as Pyomo
+    expects for scalar blocks.
+
+    :param DataFrame df: profiles, indexed by time in seconds
+    :param source: column of the source profile
+    :param load: column of the load profile
+    :param dict battery: battery parameters, overriding the default ones (None for a model without battery)
+    :param dict grid: main grid parameters, overriding the default ones (the grid costs 0.12 euros/kWh by default)
+    :return: dict
+    """
+
+    time  = {None: [df.index[0], df.index[-1]]}
+    index = list(df.index)
+
+    data_mg = {'time': time, 'pmax': {None: 30}, 'pmin': {None: 30}, 'cost': {None: 0.12}}
+    data_mg.update({k: {None: v} for k, v in ({} if grid is None else grid).items()})
+
+    data = dict(time = time,
+                mg   = {None: data_mg},
+                s    = {None: {'time': time, 'profile_index': {None: index},
+                               'profile_value': dict(zip(index, df[source]))}},
+                l    = {None: {'time': time, 'profile_index': {None: index},
+                               'profile_value': dict(zip(index, df[load]))}})
+
+    if battery is not None:
+        data_batt = {'time':   time,
+                     'dpcmax': {None: 20},
+                     'dpdmax': {None: 20},
+                     'e0':     {None: 50},
+                     'ef':     {None: 50},
+                     'emin':   {None: 10},
+                     'emax':   {None: 100},
+                     'pcmax':  {None: 20.0},
+                     'pdmax':  {None: 20.0}}
+        data_batt.update({k: {None: v} for k, v in battery.items()})
+        data['b'] = {None: data_batt}
+
+    return {None: data}
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Receding horizon (MPC) engine.
+
+The microgrid model is built and discretized once, for the length of the horizon. At each iteration of a
+:class:`data.tools.Horizon`, only the profiles and the initial states are updated, and the model is warm started
+from the shifted previous solution before being solved again. The instance stays attached to a persistent solver
+(see :class:`solvers.PersistentSolver`), so that only the modifications are pushed to it at each iteration.
+Iterations only modify mutable parameters (profiles and initial states) and the values of the variables: constraints
+modified otherwise between iterations are not seen by the solver, unless `mpc.solver.reset()` is called. The shifted
+solution is only used by solvers supporting warm start, APPSI solvers re-solve from their previous state instead.
+"""
+
+from base_units import set_profile, refresh_profiles
+from solvers import PersistentSolver
+from pyomo.environ import TransformationFactory, Var, Objective, value
+from pyomo.dae import ContinuousSet
+from timeit import default_timer
+
+import numpy as np
+import pandas as pd
+import logging
+
+__all__ = ['MPC']
+logger = logging.getLogger('lms2.mpc')
+
+
+class MPC(object):
+    """
+    Receding horizon controller of an AbstractModel.
+
+    Profiles are given as a mapping of block names to (flow name, data column), and states as a mapping of
+    parameters to variables, e.g. the initial state of charge 'b.e0' of a battery is taken from the value of
+    'b.e' at the beginning of the next horizon.
+
+    Example::
+
+        >>> horizon = Horizon(tstart='2019-02-18 00:00:00', tend='2019-02-25 00:00:00', horizon='1 day',
+        ...                   repeat_every='1 hour', time_step='30 minutes', tz='UTC')
+        >>> mpc = MPC(m, data, horizon, profiles={'s': ('p', 'P_pv'), 'l': ('p', 'P_load_1')},
+        ...           states={'b.e0': 'b.e'}, record=['mg.p', 'b.e'])
+        >>> for res in mpc.run(lambda h: get_prediction_data(h, path='data/prediction.csv')):
+        ...     print(res['iter'], res['objective'], res['time'])
+    """
+
+    def __init__(self, model, data, horizon, profiles=None, states=None, record=None,
+                 solver='appsi_highs', solver_options=None, scheme='BACKWARD', tee=False):
+        """
+
+        :param model: AbstractModel, whose time sets are bounded by 0 and the horizon duration (in seconds)
+        :param dict data: data of the first horizon, used for creating the instance
+        :param Horizon horizon: receding horizon
+        :param dict profiles: mapping of block names to (flow name, data column)
+        :param dict states: mapping of the initial state parameters to the state variables
+        :param list record: names of the time indexed variables returned at each step (all by default)
+        :param str solver: name of the persistent solver, see :class:`solvers.PersistentSolver`
+        :param dict solver_options: options of the solver
+        :param str scheme: discretization scheme of the finite difference transformation
+        :param bool tee: display the solver output
+        """
+
+        self.model          = model
+        self.data           = data
+        self.horizon        = horizon
+        self.profiles       = {} if profiles is None else profiles
+        self.states         = {} if states is None else states
+        self.record         = record
+        self.scheme         = scheme
+        self.tee            = tee
+        self.solver_name    = solver
+        self.solver_options = {} if solver_options is None else solver_options
+
+        self.instance       = None
+        self.solver         = None
+        self._time_vars     = None
+        self._shift         = int(horizon.repeat_every / horizon.time_step)
+
+    def build(self):
+        """
+        Creates and discretizes the instance, once for all the iterations, and attaches it to the persistent solver.
+
+        :return: the instance
+        """
+        t = default_timer()
+
+        self.instance = self.model.create_instance(self.data)
+        TransformationFactory('dae.finite_difference').apply_to(self.instance, nfe=self.horizon.nfe,
+                                                                 scheme=self.scheme)
+        refresh_profiles(self.instance)
+        self.solver = PersistentSolver(self.instance, solver=self.solver_name, options=self.solver_options,
+                                       tee=self.tee)
+
+        self._time_vars = [(v, list(v.index_set())) for v in self.instance.component_objects(Var, active=True)
+                           if isinstance(v.index_set(), ContinuousSet)]
+
+        logger.info(f'MPC instance built and discretized in {default_timer() - t:.3f} s.')
+        return self.instance
+
+    def update_profiles(self, df):
+        """
+        Sets the profiles of the instance to the prediction of the current horizon.
+
+        If the current horizon is shorter than the model horizon (i.e. last iteration), profiles are extended
+        with their last value.
+
+        :param DataFrame df: prediction data, indexed by the timestamps of the current horizon
+        :return: None
+        """
+        index = np.asarray((df.index - df.index[0]).total_seconds(), dtype=float)
+        duration = self.horizon.horizon.total_seconds()
+
+        padded = index[-1] < duration
+        if padded:
+            index = np.append(index, duration)
+
+        for block_name, (flow_name, column) in self.profiles.items():
+            values = df[column].to_numpy(dtype=float)
+            if padded:
+                values = np.append(values, values[-1])
+            set_profile(self.instance.find_component(block_name), flow_name, index, values)
+
+    def update_states(self):
+        """
+        Sets the initial states of the instance to the value of the state variables at the beginning of the next
+        horizon, i.e. 'repeat_every' after the beginning of the current one.
+
+        :return: None
+        """
+        shift = self.horizon.repeat_every.total_seconds()
+        for param_name, var_name in self.states.items():
+            var   = self.instance.find_component(var_name)
+            times = list(var.index_set())
+            t     = times[min(int(np.searchsorted(times, shift)), len(times) - 1)]
+            self.instance.find_component(param_name).value = value(var[t])
+
+    def warm_start(self):
+        """
+        Shifts the previous solution by 'repeat_every', so that it is used as the initial point of the next solve.
+        Last values are repeated at the end of the horizon.
+
+        :return: None
+        """
+        for var, times in self._time_vars:
+            values = [var[t].value for t in times]
+            shifted = values[self._shift:] + values[-1:] * min(self._shift, len(values))
+            for t, v in zip(times, shifted):
+                if not var[t].fixed:
+                    var[t].value = v
+
+    def solve(self):
+        """
+        Solves the instance, pushing the modifications since the previous solve, with warm start if the solver
+        supports it.
+
+        :return: solver results
+        """
+        if self.horizon.iter > 0:
+            return self.solver.resolve(warmstart=True)
+        return self.solver.solve()
+
+    def results(self, final=False):
+        """
+        Values of the recorded variables over the applied part of the current horizon.
+
+        :param bool final: if True, the whole horizon is returned, up to horizon.TEND
+        :return: DataFrame indexed by timestamps
+        """
+        if self.record is None:
+            variables = [v for v, _ in self._time_vars]
+        else:
+            variables = [self.instance.find_component(name) for name in self.record]
+
+        if final:
+            end = (self.horizon.TEND - self.horizon.current[0]).total_seconds()
+        else:
+            end = self.horizon.repeat_every.total_seconds()
+
+        columns = {}
+        for var in variables:
+            times = list(var.index_set())
+            s = pd.Series([var[t].value for t in times], index=times)
+            s = s.loc[s.index <= end] if final else s.loc[s.index < end]
+            columns[var.getname(fully_qualified=True, relative_to=self.instance)] = s
+
+        df = pd.DataFrame(columns)
+        df.index = self.horizon.current[0] + pd.to_timedelta(df.index, unit='s')
+        return df
+
+    def run(self, get_data):
+        """
+        Runs the receding horizon loop and streams the results of each step.
+
+        :param get_data: callable returning the prediction data of a given horizon
+        :return: generator of dict, with keys 'iter', 'tstart', 'status', 'objective', 'time' and 'values'
+        """
+        if self.instance is None:
+            self.build()
+
+        self.horizon.reset()
+        while True:
+            t = default_timer()
+
+            self.update_profiles(get_data(self.horizon))
+            if self.horizon.iter > 0:
+                self.update_states()
+                self.warm_start()
+            res = self.solve()
+
+            final = self.horizon.status == 'FINAL'
+            obj = next(self.instance.component_data_objects(Objective, active=True), None)
+
+            yield {'iter':      self.horizon.iter,
+                   'tstart':    self.horizon.tstart,
+                   'status':    str(res.solver.termination_condition),
+                   'objective': None if obj is None else value(obj),
+                   'time':      default_timer() - t,
+                   'values':    self.results(final=final)}
+
+            if final:
+                break
+            self.horizon.next()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Array-backed parameters.
+
+Time series parameters whose values are stored in contiguous numpy arrays.
+"""
+
+from pyomo.core.base.param import IndexedParam
+from pyomo.common.modeling import NOTSET
+from pyomo.common.timing import ConstructionTimer
+
+import numpy as np
+
+try:
+    from pyomo.core.base.param import ParamData
+except ImportError:     # Pyomo < 6.7.2
+    from pyomo.core.base.param import _ParamData as ParamData
+
+__all__ = ['ProfileParam']
+
+
+class _ProfileParamData(ParamData):
+    """
+    Data of a ProfileParam. It holds the position of its index in the time set, and reads its value from the array
+    of the parent component.
+    """
+
+    __slots__ = ('_pos',)
+
+    def __init__(self, component, pos):
+        super().__init__(component)
+        self._pos = pos
+
+    def __call__(self, exception=True):
+        return float(self.parent_component()._values[self._pos])
+
+    def set_value(self, value, idx=NOTSET):
+        self.parent_component()._values[self._pos] = value
+
+
+class ProfileParam(IndexedParam):
+    """
+    Mutable parameter indexed by a time set, defined by a profile.
+
+    The profile, i.e. its index and values, is stored as two numpy arrays, and linearly interpolated (and extrapolated)
+    over the time set in one vectorized pass. Values over the time set are stored in a third array, and each
+    parameter data reads its value by position. It behaves like a mutable indexed Param in expressions, but no Set and
+    no Param are created for the profile, and values can be updated in bulk, using :meth:`set_values`.
+
+    Data are given as a dict mapping each point of the profile to its value, or as a tuple of arrays (index, values),
+    e.g. as the data of `create_instance`. Sorted float64 arrays are kept without copy, e.g. the time axis and the
+    signals of a ProfileStore, `(store.index, store['P_pv'])`.
+    Points of the time set added after construction (e.g. by discretization) are evaluated when first accessed, or
+    using :meth:`refresh`.
+
+    >>> m.p = ProfileParam(m.time, profile={0: 0., 3600: 1.2, 7200: 0.8})
+    """
+
+    def __init__(self, *args, profile=None, **kwds):
+        """
+
+        :param profile: profile, as a dict mapping each point to its value (optional)
+        """
+        kwds['mutable'] = True
+        super().__init__(*args, **kwds)
+
+        self._profile = profile
+        self._xp      = np.zeros(0)
+        self._fp      = np.zeros(0)
+        self._values  = np.zeros(0)
+
+    @property
+    def array(self):
+        """ Values of the parameter over the time set, as a numpy array (in the order of the time set)."""
+        return self._values
+
+    @property
+    def profile(self):
+        """ Index and values of the profile, as numpy arrays."""
+        return self._xp, self._fp
+
+    def construct(self, data=None):
+        if self._constructed:
+            return
+        timer = ConstructionTimer(self)
+        self._constructed = True
+
+        points = data if data is not None else self._profile
+        if points is not None:
+            self.set_profile(points)
+        else:
+            self.refresh()
+
+        timer.report()
+
+    def _set_profile(self, index, values):
+        xp = np.asarray(index,  dtype=float)
+        fp = np.asarray(values, dtype=float)
+        if xp.shape != fp.shape:
+            raise ValueError(f'index and values of {self.name} should have the same shape, '
+                             f'but are actually {xp.shape} and {fp.shape}.')
+        if np.any(np.diff(xp) < 0):
+            order  = np.argsort(xp, kind='mergesort')
+            xp, fp = xp[order], fp[order]
+        self._xp, self._fp = xp, fp
+
+    def refresh(self):
+        """
+        Interpolates the profile over the (discretized) time set.
+
+        :return: None
+        """
+        from base_units import _interp
+
+        times = list(self.index_set())
+        if len(self._xp):
+            self._values = _interp(times, self._xp, self._fp)
+        else:
+            self._values = np.zeros(len(times))
+
+        data = self._data
+        for i, t in enumerate(times):
+            obj = data.get(t, None)
+            if obj is None:
+                obj = data[t] = _ProfileParamData(self, i)
+                obj._index = t
+            else:
+                obj._pos = i
+
+    def set_profile(self, points):
+        """
+        Sets the profile, and interpolates it over the time set.
+
+        :param points: dict mapping each point to its value, or tuple of arrays (index, values)
+        :return: None
+        """
+        if isinstance(points, tuple):
+            index, values = points
+        else:
+            index  = list(points.keys())
+            values = [points[k] for k in index]
+        self.set_values(values, index=index)
+
+    def set_values(self, values, index=None):
+        """
+        Bulk update of the parameter.
+
+        Without index, values are the new values over the time set (in its order). Otherwise, (index, values) is a new
+        profile, interpolated over the time set.
+
+        :param values: array-like
+        :param index: index of the new profile (array-like, optional)
+        :return: None
+        """
+        if index is not None:
+            self._set_profile(index, values)
+            self.refresh()
+            return
+
+        values = np.asarray(values, dtype=float)
+        if len(self._values) != len(self.index_set()):
+            self.refresh()
+        if values.shape != self._values.shape:
+            raise ValueError(f'{self.name} has {len(self._values)} values, but {values.shape} were given.')
+        self._values[:] = values
+
+    def store_values(self, new_values, check=True):
+        if hasattr(new_values, 'items'):
+            for t, val in new_values.items():
+                self[t].set_value(val)
+        else:
+            self.set_values(np.full(len(self.index_set()), new_values, dtype=float))
+
+    def extract_values(self):
+        if len(self._values) != len(self.index_set()):
+            self.refresh()
+        return dict(zip(self.index_set(), self._values.tolist()))
+
+    def _getitem_when_not_present(self, index):
+        self.refresh()
+        return self._data[index]
+
+    def _setitem_when_not_present(self, index, value, _check_domain=True):
+        obj = self._getitem_when_not_present(index)
+        obj.set_value(value, index)
+        return obj
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Presolve transformations
+
+Model transformations reducing the size of the problem handed to the solver, without modifying the units.
+"""
+
+from pyomo.core import Transformation, TransformationFactory, Constraint, value
+from pyomo.core.expr.visitor import identify_mutable_parameters
+from pyomo.repn import generate_standard_repn
+
+import logging
+
+__all__ = ['PruneRedundantRows', 'prune_redundant_rows']
+logger = logging.getLogger('lms2.presolve')
+
+
+def _row(c, tol):
+    """
+    Linear representation of a constraint, normalized so that its first coefficient (by variable id) is 1.
+
+    :return: (key, variable, lower bound, upper bound, number of nonzeros) or None if the constraint is not linear.
+             variable is only given for single-variable constraints
+    """
+    repn = generate_standard_repn(c.body, compute_values=True, quadratic=False)
+    if not repn.is_linear():
+        return None
+
+    terms = sorted(((id(v), v, a) for v, a in zip(repn.linear_vars, repn.linear_coefs) if abs(a) > tol),
+                   key=lambda x: x[0])
+
+    lb = None if c.lower is None else value(c.lower) - value(repn.constant)
+    ub = None if c.upper is None else value(c.upper) - value(repn.constant)
+
+    if not terms:
+        return (), None, lb, ub, 0
+
+    scale = terms[0][2]
+    lb, ub = (None if lb is None else lb / scale), (None if ub is None else ub / scale)
+    if scale < 0:
+        lb, ub = ub, lb
+
+    key = tuple((i, round(a / scale, 12)) for i, _, a in terms)
+    return key, terms[0][1] if len(terms) == 1 else None, lb, ub, len(terms)
+
+
+def _depends_on_mutable(c):
+    """ True if the body or the bounds of a constraint depend on mutable parameters."""
+    return any(True for e in (c.body, c.lower, c.upper) if e is not None for _ in identify_mutable_parameters(e))
+
+
+def _contains(outer, inner, tol):
+    """ True if the interval outer contains the interval inner."""
+    (olb, oub), (ilb, iub) = outer, inner
+    return (olb is None or (ilb is not None and ilb >= olb - tol)) and \
+           (oub is None or (iub is not None and iub <= oub + tol))
+
+
+def prune_redundant_rows(model, bounds=True, duplicates=True, skip_mutable=False, tol=1e-9):
+    """
+    Detects redundant rows of a model and deactivates them.
+
+    - single-variable constraints are converted to variable bounds (if tighter than the current ones),
+    - duplicated and dominated constraints, i.e. constraints with the same linear body (up to a scaling factor) and
+      looser bounds than another one, are deactivated,
+    - constraints without variables (e.g. after fixing a variable) are deactivated if they are satisfied.
+
+    Values of the mutable parameters are used, so that rows depending on them are frozen. Use skip_mutable=True
+    if these parameters are modified between solves.
+
+    :param model: Model or Block
+    :param bool bounds: convert single-variable constraints to bounds
+    :param bool duplicates: deactivate duplicated and dominated constraints
+    :param bool skip_mutable: ignore constraints depending on mutable parameters
+    :param float tol: tolerance on coefficients and bounds
+    :return: dict reporting the number of removed rows and nonzeros
+    """
+
+    report = {'rows': 0, 'nonzeros': 0, 'bounds': 0, 'duplicates': 0, 'empty': 0, 'skipped': 0}
+    kept   = {}
+
+    for c in list(model.component_data_objects(Constraint, active=True, descend_into=True)):
+        if skip_mutable and _depends_on_mutable(c):
+            report['skipped'] += 1
+            continue
+
+        row = _row(c, tol)
+        if row is None:
+            report['skipped'] += 1
+            continue
+        key, var, lb, ub, nnz = row
+
+        if nnz == 0:
+            if (lb is None or lb <= tol) and (ub is None or ub >= -tol):
+                c.deactivate()
+                report['empty'] += 1
+            else:
+                logger.warning(f'Constraint {c.name} has no variable and is not satisfied.')
+            continue
+
+        if nnz == 1 and bounds and not var.fixed:
+            if lb is not None and (var.lb is None or lb > var.lb):
+                var.setlb(lb)
+            if ub is not None and (var.ub is None or ub < var.ub):
+                var.setub(ub)
+            c.deactivate()
+            report['bounds']   += 1
+            report['nonzeros'] += 1
+            continue
+
+        if not duplicates:
+            continue
+
+        if key in kept:
+            other, olb, oub = kept[key]
+            if _contains((lb, ub), (olb, oub), tol):
+                c.deactivate()
+            elif _contains((olb, oub), (lb, ub), tol):
+                other.deactivate()
+                kept[key] = (c, lb, ub)
+            else:
+                continue
+            report['duplicates'] += 1
+            report['nonzeros']   += nnz
+        else:
+            kept[key] = (c, lb, ub)
+
+    report['rows'] = report['bounds'] + report['duplicates'] + report['empty']
+    logger.info(f"{report['rows']} rows and {report['nonzeros']} nonzeros removed from {model.name} "
+                f"({report['bounds']} converted to bounds, {report['duplicates']} duplicated or dominated, "
+                f"{report['empty']} empty).")
+
+    return report
+
+
+@TransformationFactory.register('microgrid.prune_redundant_rows',
+                                doc='Deactivate redundant rows of a microgrid model and convert single-variable '
+                                    'constraints to bounds.')
+class PruneRedundantRows(Transformation):
+    """
+    Transformation deactivating the redundant rows of a model, see :func:`prune_redundant_rows`.
+
+    The report of the last application is available as the attribute 'report'.
+
+    Example::
+
+        >>> xfrm = TransformationFactory('microgrid.prune_redundant_rows')
+        >>> xfrm.apply_to(inst)
+        >>> xfrm.report
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.report = None
+
+    def _apply_to(self, instance, **kwds):
+        self.report = prune_redundant_rows(instance, **kwds)
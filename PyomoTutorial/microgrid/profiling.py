@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+Profiling
+
+Timing, memory and size report of the phases of a microgrid run (reading data, construction, discretization,
+writing, solving, loading and plotting).
+"""
+
+from pyomo.environ import Var, Constraint
+from pyomo.core.expr.visitor import identify_variables
+from timeit import default_timer
+
+import json
+import logging
+import os
+import threading
+import tracemalloc
+
+__all__ = ['PhaseProfiler', 'model_size', 'profiler']
+logger = logging.getLogger('lms2.profiling')
+
+
+def _rss():
+    """
+    Current resident set size of the process (MB), using psutil, or /proc on Linux. None if neither is available.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class _RSSSampler(threading.Thread):
+    """
+    Thread sampling the RSS of the process, and updating the peak of every running phase.
+    """
+
+    def __init__(self, phases, interval):
+        super().__init__(daemon=True)
+        self.phases     = phases
+        self.interval   = interval
+        self._done      = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            rss = _rss()
+            for ph in list(self.phases):
+                ph['rss_peak'] = max(ph['rss_peak'], rss)
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+
+def model_size(model):
+    """
+    Number of variables, constraints and nonzeros of the active constraints of a model.
+
+    :param model: Model or Block
+    :return: dict
+    """
+    nnz, rows = 0, 0
+    for c in model.component_data_objects(Constraint, active=True, descend_into=True):
+        rows += 1
+        nnz  += sum(1 for _ in identify_variables(c.body, include_fixed=False))
+    cols = sum(1 for _ in model.component_data_objects(Var, descend_into=True))
+    return {'variables': cols, 'constraints': rows, 'nonzeros': nnz}
+
+
+class PhaseProfiler(object):
+    """
+    Timing and memory report of the phases of a run.
+
+    Each phase records its wall time, the RSS of the process at its end, its change during the phase, and the peak RSS
+    during the phase, sampled by a background thread (this needs psutil, or /proc on Linux). If trace is True, the
+    peak of the memory allocated by Python during the phase is recorded as well, using tracemalloc, which is stopped
+    once no phase is running. Model sizes are recorded with :meth:`count`.
+
+    Phases are delimited either by a context manager, or by :meth:`start` and :meth:`stop`, e.g. across the cells of
+    a notebook, where starting a phase stops the current one. Phases delimited by context managers may be nested,
+    the name of an inner phase is then prefixed by the name of the outer one, e.g. 'solve/write'. Shares of the total
+    time are computed over the outermost phases.
+
+    Example::
+
+        >>> prof = PhaseProfiler()
+        >>> with prof.phase('read'):
+        ...     df = read_data(...)
+        >>> with prof.phase('create_instance'):
+        ...     inst = m.create_instance(data)
+        >>> prof.count(inst, 'constructed')
+        >>> prof.start('discretize')
+        >>> TransformationFactory('dae.finite_difference').apply_to(inst, nfe=96)
+        >>> prof.stop()
+        >>> prof.count(inst, 'discretized')
+        >>> with prof.phase('solve'):
+        ...     with prof.phase('run'):
+        ...         res = SolverFactory('glpk').solve(inst, load_solutions=False)
+        ...     with prof.phase('load'):
+        ...         inst.solutions.load_from(res)
+        >>> prof.to_frame()
+        >>> prof.to_json('profile.json')
+    """
+
+    def __init__(self, trace=False, interval=0.01):
+        """
+
+        :param bool trace: record the peak of the memory allocated by Python during each phase, using tracemalloc
+        :param float interval: sampling interval of the RSS (s)
+        """
+        self.trace      = trace
+        self.interval   = interval
+        self.phases     = []
+        self.sizes      = {}
+        self._running   = []
+        self._sampler   = None
+        self._tracing   = False
+
+    def _update_py_peak(self):
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        for ph in self._running:
+            ph['py_peak'] = max(ph['py_peak'], peak)
+
+    def start(self, name, nested=False):
+        """
+        Starts a phase. Unless nested, the running phases are stopped first.
+
+        :param str name: name of the phase
+        :param bool nested: start the phase within the running one
+        :return: None
+        """
+        if not nested:
+            while self._running:
+                self.stop()
+
+        rss = _rss()
+        ph  = {'phase': '/'.join([p['phase'] for p in self._running[-1:]] + [name]),
+               'depth': len(self._running), 'rss_start': rss, 'rss_peak': rss}
+
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            self._update_py_peak()
+            tracemalloc.reset_peak()
+            ph['py_peak'] = tracemalloc.get_traced_memory()[1] / 2**20
+
+        if rss is not None and self._sampler is None:
+            self._sampler = _RSSSampler(self._running, self.interval)
+            self._sampler.start()
+
+        ph['tic'] = default_timer()
+        self._running.append(ph)
+
+    def stop(self):
+        """
+        Stops the innermost running phase.
+
+        :return: record of the phase
+        """
+        if not self._running:
+            raise RuntimeError('No phase is running.')
+        toc = default_timer()
+        if self.trace:
+            self._update_py_peak()
+
+        ph  = self._running.pop()
+        rss = _rss()
+        rec = {'phase': ph['phase'], 'depth': ph['depth'], 'time': toc - ph['tic'], 'rss': rss,
+               'rss_delta': None if rss is None else rss - ph['rss_start'],
+               'rss_peak': None if rss is None else max(ph['rss_peak'], rss)}
+        if self.trace:
+            rec['py_peak'] = ph['py_peak']
+
+        if not self._running:
+            if self._sampler is not None:
+                self._sampler.stop()
+                self._sampler = None
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+
+        self.phases.append(rec)
+        logger.info(f"{rec['phase']}: {rec['time']:.3f} s")
+        return rec
+
+    def phase(self, name):
+        """
+        Context manager delimiting a phase, nested within the running one if any.
+
+        :param str name: name of the phase
+        """
+        return _Phase(self, name)
+
+    def count(self, model, label):
+        """
+        Records the size of a model, e.g. after construction and after discretization.
+
+        :param model: Model or Block
+        :param str label: label of the record
+        :return: dict
+        """
+        self.sizes[label] = model_size(model)
+        return self.sizes[label]
+
+    def reset(self):
+        """ Clears the records, stopping the running phases."""
+        while self._running:
+            self.stop()
+        self.phases   = []
+        self.sizes    = {}
+
+    def to_frame(self):
+        """
+        Records of the phases as a DataFrame, with the share of each phase in the total time.
+
+        :return: DataFrame
+        """
+        from pandas import DataFrame
+
+        df = DataFrame(self.phases)
+        if not df.empty:
+            df['share'] = df['time'] / df.loc[df['depth'] == 0, 'time'].sum()
+        return df
+
+    def to_json(self, path=None):
+        """
+        Dumps the report as json.
+
+        :param path: output file (optional)
+        :return: json string
+        """
+        s = json.dumps({'phases': self.phases, 'sizes': self.sizes}, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(s)
+        return s
+
+    def to_csv(self, path):
+        """
+        Writes the phases as csv. Sizes are added as columns, e.g. 'discretized_nonzeros'.
+
+        :param path: output file
+        :return: None
+        """
+        df = self.to_frame()
+        for label, size in self.sizes.items():
+            for key, val in size.items():
+                df[f'{label}_{key}'] = val
+        df.to_csv(path, index=False)
+
+
+class _Phase(object):
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name     = name
+
+    def __enter__(self):
+        self.profiler.start(self.name, nested=True)
+        return self.profiler
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.profiler.stop()
+
+
+profiler = PhaseProfiler()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent solvers
+
+Solve layer keeping an in-process solver attached to an instance, so that repeated solves only push the
+modifications of the model (bounds, coefficients and right-hand sides) instead of writing and parsing files.
+"""
+
+from pyomo.environ import SolverFactory, Constraint, Objective, Var, value
+from pyomo.core.expr.visitor import identify_mutable_parameters
+from pyomo.opt import SolverStatus, TerminationCondition
+from timeit import default_timer
+
+import logging
+
+__all__ = ['PersistentSolver']
+logger = logging.getLogger('lms2.solvers')
+
+
+class PersistentSolver(object):
+    """
+    Persistent solver attached to an instance.
+
+    APPSI solvers (e.g. 'appsi_highs') detect the modifications of mutable parameters and variable bounds
+    by themselves, and are configured so that they do not look for structural changes of the model.
+    For the other persistent solvers (e.g. 'gurobi_persistent', 'cplex_persistent'), the values of mutable
+    parameters and variable bounds are tracked, and only the constraints, bounds and objective depending on
+    modified values are pushed to the solver.
+
+    Only the modifications of mutable parameters, variable bounds and fixed variables are pushed. Constraints,
+    variables and objectives added, removed or modified otherwise after the instance is attached are not seen by the
+    solver, unless structural is True, in which case they are looked for before each solve (at the cost of a slower
+    update), or :meth:`reset` is called after modifying them. APPSI solvers keep their model between solves, and
+    re-solve from its previous state: the warmstart flag only applies to the other persistent solvers.
+
+    Example::
+
+        >>> solver = PersistentSolver(inst, solver='appsi_highs')
+        >>> res = solver.solve()
+        >>> set_profile(inst.s, 'p', index, new_values)
+        >>> res = solver.resolve()
+    """
+
+    def __init__(self, instance, solver='appsi_highs', options=None, tee=False, structural=False):
+        """
+
+        :param instance: concrete model (instance)
+        :param str solver: name of the persistent solver
+        :param dict options: solver options
+        :param bool tee: display the solver output
+        :param bool structural: look for structural modifications of the instance before each solve
+        """
+
+        self.instance   = instance
+        self.name       = solver
+        self.solver     = SolverFactory(solver)
+        self.tee        = tee
+        self.appsi      = solver.startswith('appsi')
+        self.structural = structural
+        self.last_time  = None
+
+        for k, v in ({} if options is None else options).items():
+            self.solver.options[k] = v
+
+        if self.appsi and not structural:
+            config = self.solver.update_config
+            config.check_for_new_or_removed_constraints = False
+            config.check_for_new_or_removed_vars        = False
+            config.check_for_new_or_removed_params      = False
+            config.check_for_new_objective              = False
+            config.update_constraints                   = False
+            config.update_named_expressions             = False
+        elif not self.appsi:
+            self.solver.set_instance(instance)
+            self._track()
+
+    def reset(self):
+        """
+        Attaches the instance to the solver again, e.g. after adding, removing or modifying constraints.
+
+        :return: None
+        """
+        self.solver.set_instance(self.instance)
+        if not self.appsi:
+            self._track()
+
+    def _track(self):
+        """ Records the mutable parameters used by each row and the current values of parameters and bounds."""
+
+        self._params    = {}
+        self._rows      = {}
+        self._objective = set()
+
+        for c in self.instance.component_data_objects(Constraint, active=True, descend_into=True):
+            for e in (c.body, c.lower, c.upper):
+                if e is None:
+                    continue
+                for p in identify_mutable_parameters(e):
+                    self._params[id(p)] = p
+                    self._rows.setdefault(id(p), []).append(c)
+
+        for o in self.instance.component_data_objects(Objective, active=True, descend_into=True):
+            for p in identify_mutable_parameters(o.expr):
+                self._params[id(p)] = p
+                self._objective.add(id(p))
+
+        self._values = {k: p.value for k, p in self._params.items()}
+        self._vars   = list(self.instance.component_data_objects(Var, descend_into=True))
+        self._bounds = [(v.lb, v.ub, v.fixed, v.value if v.fixed else None) for v in self._vars]
+
+    def update(self):
+        """
+        Pushes the modifications of the instance to the solver (only for non APPSI solvers). If structural is True,
+        the instance is attached to the solver again.
+
+        :return: number of modified rows, variables and objectives
+        """
+
+        if self.appsi:
+            return 0, 0, 0
+        if self.structural:
+            self.reset()
+            rows = sum(1 for _ in self.instance.component_data_objects(Constraint, active=True, descend_into=True))
+            return rows, len(self._vars), 1
+
+        changed = [k for k, p in self._params.items() if p.value != self._values[k]]
+
+        rows = {}
+        for k in changed:
+            self._values[k] = self._params[k].value
+            for c in self._rows.get(k, []):
+                rows[id(c)] = c
+        for c in rows.values():
+            self.solver.remove_constraint(c)
+            self.solver.add_constraint(c)
+
+        n_vars = 0
+        for i, v in enumerate(self._vars):
+            state = (v.lb, v.ub, v.fixed, v.value if v.fixed else None)
+            if state != self._bounds[i]:
+                self._bounds[i] = state
+                self.solver.update_var(v)
+                n_vars += 1
+
+        n_obj = 0
+        if any(k in self._objective for k in changed):
+            self.solver.set_objective(next(self.instance.component_data_objects(Objective, active=True)))
+            n_obj = 1
+
+        logger.debug(f'{len(rows)} rows, {n_vars} variables and {n_obj} objective pushed to {self.name}.')
+        return len(rows), n_vars, n_obj
+
+    def solve(self, warmstart=False, **kwds):
+        """
+        Solves the instance.
+
+        :param bool warmstart: warm start from the current values of the variables, if the solver supports it
+                               (APPSI solvers re-solve from their previous state instead)
+        :param kwds: other keyword arguments of the solver
+        :return: solver results
+        """
+
+        t = default_timer()
+        if self.appsi:
+            res = self.solver.solve(self.instance, tee=self.tee, **kwds)
+        else:
+            if warmstart and self.solver.warm_start_capable():
+                kwds['warmstart'] = True
+            res = self.solver.solve(tee=self.tee, save_results=False, load_solutions=True, **kwds)
+        self.last_time = default_timer() - t
+
+        if res.solver.status != SolverStatus.ok or \
+                res.solver.termination_condition != TerminationCondition.optimal:
+            logger.warning(f'{self.name} returned status {res.solver.status}, '
+                           f'termination condition {res.solver.termination_condition}.')
+        return res
+
+    def resolve(self, warmstart=True, **kwds):
+        """
+        Pushes the modifications of the instance to the solver and solves it again, with warm start.
+
+        :param bool warmstart: warm start from the previous solution, if the solver supports it
+                               (APPSI solvers re-solve from their previous state instead)
+        :param kwds: other keyword arguments of the solver
+        :return: solver results
+        """
+        self.update()
+        return self.solve(warmstart=warmstart, **kwds)
+
+    def objective(self):
+        """ Value of the active objective of the instance."""
+        return value(next(self.instance.component_data_objects(Objective, active=True)))
@@ -8,7 +8,7 @@ from base_units import AbsFlowSource, AbsFixedFlowSource, AbsFlowLoad, AbsFixedF
 
 __all__ = ['AbsPowerSource',        'AbsFixedPowerSource',      'AbsScalablePowerSource',
            'AbsPowerLoad',          'AbsFixedPowerLoad',        'AbsScalablePowerLoad',
-           'AbsProgrammableLoad',   'AbsDebugSource', 'PVPanels']
+           'AbsProgrammableLoad',   'AbsProgrammableLoadFleet', 'AbsDebugSource', 'PVPanels']
 
 
 class AbsPowerSource(AbsFlowSource):
@@ -186,6 +186,77 @@ class AbsProgrammableLoad(AbsPowerSource):
         self._delay = Constraint(self.time, rule=_delay, doc='the load follow the profile')
 
 
+class AbsProgrammableLoadFleet(AbsPowerSource):
+    """
+    Fleet of programmable loads with fixed input profiles.
+
+    Each appliance of the fleet (ex : washing machines, EV chargers) is turned on once, at a time step of the
+    discretized time set within its window [w1, w2], and then consumes its own profile, indexed by the time since it
+    was turned on. Start variables are only declared for the time steps of each window, and the power of the fleet
+    is built as a sparse convolution of the profiles over the discretized time set, so that the size of the model
+    scales with the size of the windows rather than with the horizon.
+
+    As for AbsProgrammableLoad, method compile must be called once the time set is discretized.
+    """
+    def __init__(self, *args, flow_name='p', **kwds):
+
+        super().__init__(*args, flow_name=flow_name, **kwds)
+
+        self.appliances     = Set(doc='appliances of the fleet')
+        self.w1             = Param(self.appliances, doc='beginning of the window where the appliance can be '
+                                                         'turned ON (s)')
+        self.w2             = Param(self.appliances, doc='end of the window where the appliance can be turned ON (s)')
+        self.profile_index  = Set(dimen=2, doc='(appliance, time since the appliance was turned ON)')
+        self.profile_value  = Param(self.profile_index, doc='power profiles of the appliances')
+
+    def compile(self):
+        from base_units import _interp
+        from bisect import bisect_left, bisect_right
+
+        times = sorted(self.time)
+        pos = {t: i for i, t in enumerate(times)}
+
+        profiles = {a: ([], []) for a in self.appliances}
+        for a, tau in sorted(self.profile_index):
+            profiles[a][0].append(tau)
+            profiles[a][1].append(self.profile_value[a, tau])
+
+        slots = {}
+        terms = {t: [] for t in times}
+        for a in self.appliances:
+            taus, values = profiles[a]
+            duration = taus[-1] if taus else 0
+            lo = bisect_left(times, self.w1[a])
+            hi = bisect_right(times, min(self.w2[a], times[-1] - duration))
+            slots[a] = times[lo:hi]
+            if not slots[a]:
+                raise ValueError(f'Appliance {a} of {self.name} can not be turned ON within its window '
+                                 f'[{self.w1[a]}, {self.w2[a]}] and completed before the end of the horizon.')
+            if not taus:
+                continue
+
+            for s in slots[a]:
+                i = pos[s]
+                j = bisect_right(times, s + duration)
+                for t, v in zip(times[i:j], _interp([t - s for t in times[i:j]], taus, values).tolist()):
+                    if v != 0:
+                        terms[t].append((a, s, v))
+
+        self.start_slots = Set(dimen=2, ordered=True, initialize=[(a, s) for a in slots for s in slots[a]],
+                               doc='(appliance, time step where the appliance can be turned ON)')
+        self.u = Var(self.start_slots, within=Binary,
+                     doc='binary, equals to 1 when the appliance is turned ON at this time step, 0 otherwise.')
+
+        def _turned_on(m, a):
+            return sum(m.u[a, s] for s in slots[a]) == 1
+
+        def _delay(m, t):
+            return m.p[t] == sum(v * m.u[a, s] for a, s, v in terms[t])
+
+        self._turned_on = Constraint(self.appliances, rule=_turned_on, doc='each appliance is turned on only once')
+        self._delay     = Constraint(self.time, rule=_delay, doc='the fleet follows the delayed profiles')
+
+
 class AbsDebugSource(AbsPowerSource):
     """
     Debug Power source.
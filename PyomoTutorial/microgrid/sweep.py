@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Scenario sweep
+
+Solves the daily (or weekly) microgrid problem for every period of a dataset, in parallel worker processes.
+Each worker builds the abstract model once and creates one instance per period.
+"""
+
+from models import microgrid_model, microgrid_data
+from base_units import refresh_profiles
+from pyomo.environ import SolverFactory, TransformationFactory, Objective, value
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from timeit import default_timer
+
+import pandas as pd
+import logging
+
+__all__ = ['split_periods', 'ScenarioSweep']
+logger = logging.getLogger('lms2.sweep')
+
+_MODEL = None
+
+
+def split_periods(df, period='1D'):
+    """
+    Splits a dataset into independent periods.
+
+    Periods start at midnight of the first day of the dataset. Each period includes the first timestamp of the next
+    one, so that its time set spans the whole period. Incomplete periods (at the end of the dataset or because of
+    missing timestamps) are dropped.
+
+    :param DataFrame df: data indexed by timestamps, with a regular time step
+    :param period: duration of the periods (string or pandas Timedelta)
+    :return: list of (start timestamp, DataFrame indexed by time in seconds from the start)
+    """
+    period = pd.Timedelta(period)
+    step   = df.index[1] - df.index[0]
+    size   = int(period / step) + 1
+
+    periods = []
+    for start in pd.date_range(df.index[0].normalize(), df.index[-1], freq=period):
+        d = df.loc[start:start + period]
+        if len(d) != size or d.index[0] != start:
+            continue
+        d = d.copy()
+        d.index = (d.index - start).total_seconds()
+        periods.append((start, d))
+    return periods
+
+
+def _init_worker(builder, builder_kwds):
+    global _MODEL
+    _MODEL = builder(**builder_kwds)
+
+
+def _solve_period(start, df, data_builder, data_kwds, solver, solver_options, record):
+    t = default_timer()
+
+    inst = _MODEL.create_instance(data_builder(df, **data_kwds))
+    TransformationFactory('dae.finite_difference').apply_to(inst, nfe=len(df) - 1)
+    refresh_profiles(inst)
+
+    opt = SolverFactory(solver)
+    for k, v in solver_options.items():
+        opt.options[k] = v
+    res = opt.solve(inst, load_solutions=True)
+
+    values = {}
+    for name in record:
+        var = inst.find_component(name)
+        values[name] = pd.Series({i: var[i].value for i in var.index_set()})
+    out = pd.DataFrame(values).sort_index()
+    out.index = start + pd.to_timedelta(out.index, unit='s')
+
+    obj = next(inst.component_data_objects(Objective, active=True))
+    out['objective'] = value(obj)
+    out['status']    = str(res.solver.termination_condition)
+    out['period']    = start
+    out['time']      = default_timer() - t
+
+    return start, out
+
+
+class ScenarioSweep(object):
+    """
+    Parallel sweep of independent microgrid problems over a dataset.
+
+    Example::
+
+        >>> sweep = ScenarioSweep(data_kwds={'battery': {'emax': 200}}, record=('b.e', 'mg.p'))
+        >>> for start, res in sweep.iter_results(df_s, period='1D'):
+        ...     print(start, res['objective'].iloc[0])
+        >>> results = sweep.run(df_s, period='7D')
+    """
+
+    def __init__(self, builder=microgrid_model, builder_kwds=None, data_builder=microgrid_data, data_kwds=None,
+                 solver='glpk', solver_options=None, record=('b.e', 'mg.p'), processes=None):
+        """
+
+        :param builder: picklable function returning the AbstractModel, called once in each worker, with the horizon
+                        of the periods (in seconds) as keyword argument 'horizon'
+        :param dict builder_kwds: keyword arguments of builder
+        :param data_builder: picklable function returning the data of one period, from a DataFrame indexed in seconds
+        :param dict data_kwds: keyword arguments of data_builder
+        :param str solver: name of the solver
+        :param dict solver_options: options of the solver
+        :param record: names of the time indexed variables to be collected
+        :param int processes: number of worker processes (number of cores by default)
+        """
+
+        self.builder        = builder
+        self.builder_kwds   = {} if builder_kwds is None else builder_kwds
+        self.data_builder   = data_builder
+        self.data_kwds      = {'battery': {}} if data_kwds is None else data_kwds
+        self.solver         = solver
+        self.solver_options = {} if solver_options is None else solver_options
+        self.record         = list(record)
+        self.processes      = processes
+
+    def iter_results(self, df, period='1D'):
+        """
+        Solves every period of a dataset and streams the results as soon as workers finish.
+
+        :param DataFrame df: data indexed by timestamps
+        :param period: duration of the periods
+        :return: generator of (start timestamp, DataFrame)
+        """
+        periods = split_periods(df, period=period)
+        logger.info(f'Sweep over {len(periods)} periods of {period}.')
+
+        builder_kwds = {'horizon': pd.Timedelta(period).total_seconds(), **self.builder_kwds}
+        with ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker,
+                                 initargs=(self.builder, builder_kwds)) as pool:
+            futures = [pool.submit(_solve_period, start, d, self.data_builder, self.data_kwds,
+                                   self.solver, self.solver_options, self.record) for start, d in periods]
+            for f in as_completed(futures):
+                start, res = f.result()
+                logger.debug(f'Period starting at {start} solved in {res["time"].iloc[0]:.3f} s.')
+                yield start, res
+
+    def run(self, df, period='1D'):
+        """
+        Solves every period of a dataset and collects the results.
+
+        :param DataFrame df: data indexed by timestamps
+        :param period: duration of the periods
+        :return: DataFrame indexed by (period, timestamp)
+        """
+        results = [res for _, res in self.iter_results(df, period=period)]
+        if not results:
+            return pd.DataFrame()
+        return pd.concat(results).set_index('period', append=True).swaplevel().sort_index()
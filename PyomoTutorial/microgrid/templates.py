@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+Model templates
+
+Cache of constructed and discretized instances of AbstractModels. A template is built once for a given structure
+and time grid, from the structural part of the data, then handed out as clones reparameterized with the data of
+each run.
+"""
+
+from base_units import refresh_profiles
+from params import ProfileParam
+from pyomo.environ import TransformationFactory, Block, Param, Set
+from pyomo.dae import ContinuousSet
+from pyomo.version import version as pyomo_version
+from timeit import default_timer
+
+import hashlib
+import logging
+import os
+import sys
+
+__all__ = ['TemplateCache', 'DiscretizedTemplate', 'template_key', 'structural_data', 'reparameterize']
+logger = logging.getLogger('lms2.templates')
+
+
+def _signature(block, data):
+    """
+    Structural signature of the data of a block: values of sets, time bounds and non mutable parameters, and None-ness
+    of mutable parameters, which decides whether constraints are skipped. Profiles are left out.
+    """
+    profiles = _profile_names(block)
+    sig = []
+    for name in sorted(data, key=str):
+        val, comp = data[name], block.component(name)
+        if comp is None or isinstance(comp, ProfileParam) or name in profiles or name in profiles.values():
+            continue
+        if isinstance(comp, Block):
+            sig.append((name, _signature(comp, val.get(None, val))))
+        elif isinstance(comp, Param) and comp.mutable:
+            if comp.is_indexed():
+                sig.append((name, tuple(sorted(repr(k) for k, v in val.items() if v is not None))))
+            else:
+                sig.append((name, val[None] is None))
+        else:
+            sig.append((name, repr(val)))
+    return tuple(sig)
+
+
+def _code_stamp(model):
+    """ Version of Pyomo, and modification times of the modules defining the units of a model."""
+    files = set()
+    for blk in model.component_objects(Block, descend_into=True):
+        module = sys.modules.get(type(blk).__module__, None)
+        if getattr(module, '__file__', None):
+            files.add((module.__name__, os.path.getmtime(module.__file__)))
+    return pyomo_version, tuple(sorted(files))
+
+
+def template_key(model, data, nfe, scheme='BACKWARD'):
+    """
+    Key of a template: name of the model, its units (name, class and components, which depend on the options of the
+    units), horizon, nfe and scheme, a hash of the structural part of the data, and a stamp of the code of the units.
+
+    :param model: AbstractModel
+    :param dict data: data of the model, as given to create_instance
+    :param nfe: number of finite elements
+    :param str scheme: discretization scheme
+    :return: tuple
+    """
+    units   = tuple((blk.name, type(blk).__name__,
+                     tuple(sorted(c.local_name for c in blk.component_objects(descend_into=False))))
+                    for blk in model.component_objects(Block, descend_into=True))
+    d       = data.get(None, data)
+    horizon = tuple(d['time'][None]) if 'time' in d else None
+    sig     = hashlib.sha1(repr(_signature(model, d)).encode()).hexdigest()
+    return model.name, units, horizon, int(nfe), scheme, sig, _code_stamp(model)
+
+
+def _load(block, data, profiles):
+    for name, val in data.items():
+        comp = block.component(name)
+        if comp is None:
+            raise KeyError(f'{block.name} has no component named {name}.')
+
+        if isinstance(comp, Block):
+            _load(comp, val.get(None, val), profiles)
+        elif isinstance(comp, ContinuousSet):
+            if [min(val[None]), max(val[None])] != [comp.first(), comp.last()]:
+                raise ValueError(f'Bounds of {comp.name} differ from the ones of the template, '
+                                 f'i.e. the time grid can not be reused.')
+        elif name in profiles.get(id(block), ()) or isinstance(comp, ProfileParam):
+            continue        # profiles are loaded by refresh_profiles
+        elif isinstance(comp, Param) and comp.mutable:
+            if comp.is_indexed():
+                comp.store_values(val)
+            else:
+                if (comp.value is None) != (val[None] is None):
+                    raise ValueError(f'{comp.name} is None in the template or in the data, but not in both. '
+                                     f'Constraints depending on it differ, i.e. the template can not be reused.')
+                comp.value = val[None]
+        elif isinstance(comp, Param):
+            new = val if comp.is_indexed() else val[None]
+            old = comp.extract_values() if comp.is_indexed() else comp.value
+            if new != old:
+                raise ValueError(f'{comp.name} is not mutable and its data differs from the one of the template.')
+        elif isinstance(comp, Set):
+            raise ValueError(f'{comp.name} is a Set and can not be reparameterized.')
+
+
+def _profile_names(block):
+    names = {}
+    for flow_name, (index_name, profile_name) in getattr(block, '_profiles', {}).items():
+        names[profile_name] = index_name
+    for flow_name, (index_name, low_profile_name, up_profile_name) in getattr(block, '_bounds', {}).items():
+        names[low_profile_name] = names[up_profile_name] = index_name
+    return names
+
+
+def structural_data(model, data):
+    """
+    Structural part of the data of a model, i.e. the data needed for building its constraints and time grid.
+
+    Profiles (see `fix_profile`, `bound_profile` and ProfileParam) are replaced by constant profiles, since they are
+    re-evaluated when the template is reparameterized. Other data, i.e. sets, bounds of the time sets and parameters,
+    are kept : parameters set to None (e.g. no final state of a battery) skip constraints.
+
+    :param model: AbstractModel (or one of its blocks)
+    :param dict data: data of the model, as given to create_instance
+    :return: dict
+    """
+    top  = None in data
+    data = data.get(None, data)
+
+    profiles = _profile_names(model)
+    res = {}
+    for name, val in data.items():
+        comp = model.component(name)
+        if isinstance(comp, Block):
+            res[name] = structural_data(comp, val)
+        elif isinstance(comp, ProfileParam):
+            continue
+        elif name in profiles:
+            res[name] = {0.: 0.}
+        elif name in profiles.values():
+            res[name] = {None: [0.]}
+        else:
+            res[name] = val
+
+    return {None: res} if top else res
+
+
+def reparameterize(instance, data):
+    """
+    Loads new data into a constructed (and discretized) instance.
+
+    Data has the structure of the data given to `create_instance`. Mutable parameters are set, profiles created by
+    `fix_profile` are replaced, and re-evaluated over the discretized time sets. Bounds of the time sets and values
+    of non mutable parameters must be the ones of the instance.
+
+    :param instance: instance
+    :param dict data: new data
+    :return: instance
+    """
+    profiles = {}
+    for blk in instance.component_data_objects(Block, descend_into=True):
+        for index_name, profile_name in getattr(blk, '_profiles', {}).values():
+            profiles.setdefault(id(blk), set()).update((index_name, profile_name))
+        for names in getattr(blk, '_bounds', {}).values():
+            profiles.setdefault(id(blk), set()).update(names)
+
+    _load(instance, data.get(None, data), profiles)
+    refresh_profiles(instance, data)
+    return instance
+
+
+class DiscretizedTemplate(object):
+    """
+    Constructed and discretized instance of a model, reused for every run on the same time grid.
+
+    The time sets and DerivativeVars of the model are discretized once, from the structural part of the data
+    (see :func:`structural_data`). Each run only fills the data dependent parameters, i.e. profiles and mutable
+    parameters, of a clone of the template (or of the template itself).
+
+    Example::
+
+        >>> tpl = DiscretizedTemplate(m, data_of(days[0]), nfe=96)
+        >>> for day in days:
+        ...     inst = tpl.instantiate(data_of(day))
+        ...     SolverFactory('glpk').solve(inst)
+    """
+
+    def __init__(self, model, data, nfe, scheme='BACKWARD', transformation='dae.finite_difference', key=None):
+        """
+
+        :param model: AbstractModel
+        :param dict data: data of the model, only its structural part is used
+        :param nfe: number of finite elements
+        :param str scheme: discretization scheme
+        :param str transformation: name of the discretization transformation
+        :param key: key of the template (see :func:`template_key` by default)
+        """
+        self.key = template_key(model, data, nfe, scheme=scheme) if key is None else key
+
+        t = default_timer()
+        self.instance = model.create_instance(structural_data(model, data))
+        TransformationFactory(transformation).apply_to(self.instance, nfe=nfe, scheme=scheme)
+        refresh_profiles(self.instance)
+        self.build_time = default_timer() - t
+        logger.info(f'Template of {model.name} built in {self.build_time:.3f} s.')
+
+    def instantiate(self, data, clone=True):
+        """
+        Returns an instance of the model for the given data.
+
+        :param dict data: data of the instance, as given to create_instance
+        :param bool clone: if False, the template itself is reparameterized in place and returned
+        :return: instance
+        """
+        inst = self.instance.clone() if clone else self.instance
+        return reparameterize(inst, data)
+
+
+class TemplateCache(object):
+    """
+    Cache of discretized templates, indexed by structure and time grid.
+
+    The first request for a given structure and time grid builds a :class:`DiscretizedTemplate`, following requests
+    only instantiate it with their data. Templates are kept in memory only, since the rules of the units are local
+    functions and can not be pickled.
+
+    Example::
+
+        >>> cache = TemplateCache()
+        >>> for day in days:
+        ...     inst = cache.get(m, data_of(day), nfe=96)
+        ...     SolverFactory('glpk').solve(inst)
+    """
+
+    def __init__(self, transformation='dae.finite_difference'):
+        """
+
+        :param str transformation: name of the discretization transformation
+        """
+        self.transformation = transformation
+        self._templates     = {}
+
+    def __len__(self):
+        return len(self._templates)
+
+    def clear(self):
+        """ Clears the templates kept in memory."""
+        self._templates = {}
+
+    def template(self, model, data, nfe, scheme='BACKWARD', key=None):
+        """
+        Returns the template of a model, building it if necessary.
+
+        :param model: AbstractModel
+        :param dict data: data of the model, used if the template has to be built
+        :param nfe: number of finite elements
+        :param str scheme: discretization scheme
+        :param key: key of the template (see :func:`template_key` by default)
+        :return: DiscretizedTemplate
+        """
+        key = template_key(model, data, nfe, scheme=scheme) if key is None else key
+
+        template = self._templates.get(key, None)
+        if template is None:
+            template = DiscretizedTemplate(model, data, nfe, scheme=scheme, transformation=self.transformation,
+                                           key=key)
+            self._templates[key] = template
+        return template
+
+    def get(self, model, data, nfe, scheme='BACKWARD', key=None, clone=True):
+        """
+        Returns an instance of a model for the given data, from its template.
+
+        :param model: AbstractModel
+        :param dict data: data of the instance, as given to create_instance
+        :param nfe: number of finite elements
+        :param str scheme: discretization scheme
+        :param key: key of the template (see :func:`template_key` by default)
+        :param bool clone: if False, the template itself is reparameterized in place and returned
+        :return: instance
+        """
+        return self.template(model, data, nfe, scheme=scheme, key=key).instantiate(data, clone=clone)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Topology
+
+Assembly of a microgrid from a description of its buses, using the Ports of the units.
+"""
+
+from pyomo.environ import Block, Constraint, Var, TransformationFactory
+from pyomo.network import Port, Arc
+
+import logging
+
+__all__ = ['build_topology', 'expand_topology']
+logger = logging.getLogger('lms2.topology')
+
+
+def _read(topology):
+    if not isinstance(topology, str):
+        return topology
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError('PyYAML is needed for reading a topology from a yaml file. Use a dict instead.')
+    with open(topology) as f:
+        return yaml.safe_load(f)
+
+
+def _member(model, name):
+    """
+    Resolves a member of a bus, i.e. 'unit' or 'unit:component'.
+    Without component, the first Port of the unit is used, or its flow 'p' if the unit has no Port.
+    """
+    unit_name, _, comp_name = name.partition(':')
+    unit = model.find_component(unit_name)
+    if unit is None:
+        raise KeyError(f'{model.name} has no unit named {unit_name}.')
+
+    if comp_name:
+        comp = unit.component(comp_name)
+        if comp is None:
+            raise KeyError(f'{unit.name} has no component named {comp_name}.')
+        return comp
+
+    port = next(unit.component_objects(Port, descend_into=False), None)
+    return port if port is not None else unit.component('p')
+
+
+def build_topology(model, topology, time=None, arcs=True):
+    """
+    Connects the units of a model according to a topology of buses.
+
+    The topology maps each bus to its sources and loads, e.g.::
+
+        {'ac': {'sources': ['mg', 's'], 'loads': ['l', 'b']}}
+
+    or the equivalent yaml file. Members are unit names, optionally followed by ':component' for choosing the Port
+    or flow of the unit. By default, the first Port of the unit is used, or its flow 'p'. As for the units of this
+    package, Ports are expected to hold a single conservative member named 'f'.
+
+    For each bus, a block 'bus_<name>' is added to the model, with one indexed power balance constraint
+    (sum of sources == sum of loads) built in bulk. With arcs=True, each Port member adds a Var, a Port and an Arc
+    to the bus, i.e. one more variable and one more equality per time step compared with a direct balance, and Arcs
+    are expanded with :func:`expand_topology`, once the instance is discretized. With arcs=False, the balance uses
+    the members of the Ports directly.
+
+    It can be applied to an AbstractModel, before creating instances: members are looked up by name when the balance
+    is constructed.
+
+    :param model: Model (concrete or abstract)
+    :param topology: dict or path of a yaml file
+    :param time: time set indexing the balance constraints (model.time by default)
+    :param bool arcs: connect Port members with Arcs
+    :return: dict of the bus blocks, indexed by bus names
+    """
+
+    topology = _read(topology)
+    time = model.time if time is None else time
+
+    buses = {}
+    for bus_name, members in topology.items():
+        bus = Block(doc=f'bus {bus_name}')
+        model.add_component(f'bus_{bus_name}', bus)
+
+        terms = []
+        for sign, key in ((1, 'sources'), (-1, 'loads')):
+            for name in members.get(key, []):
+                comp = _member(model, name)
+                if isinstance(comp, Port) and arcs:
+                    i = len(terms)
+                    flow = Var(time, initialize=0, doc=f'flow of {name} on bus {bus_name}')
+                    bus.add_component(f'f_{i}', flow)
+                    bus.add_component(f'port_{i}', Port(initialize={'f': (flow, Port.Conservative)}))
+                    bus.add_component(f'arc_{i}', Arc(source=comp, destination=bus.component(f'port_{i}')))
+                    comp = flow
+                terms.append((sign, comp.getname(fully_qualified=True, relative_to=model), isinstance(comp, Port)))
+
+        def _balance(b, t, terms=terms):
+            root = b.parent_block()
+            flows = []
+            for sign, path, port in terms:
+                comp = root.find_component(path)
+                flows.append(sign * (comp.vars['f'][t] if port else comp[t]))
+            return sum(flows) == 0
+
+        bus.balance = Constraint(time, rule=_balance, doc=f'power balance of bus {bus_name}')
+        buses[bus_name] = bus
+
+        logger.info(f'bus {bus_name}: {len(terms)} members.')
+
+    return buses
+
+
+def expand_topology(instance):
+    """
+    Expands the Arcs of an instance, once. It should be called after discretization.
+
+    :param instance: instance
+    :return: instance
+    """
+    TransformationFactory('network.expand_arcs').apply_to(instance)
+    return instance
@@ -7,13 +7,150 @@ Basic block for modeling components.
 
 from pyomo.core.base.PyomoModel import Model as PyomoModel
 from pyomo.core.base.block import SimpleBlock
+from timeit import default_timer
 
 import logging
+import json
 
-__all__ = ['Unit']
+__all__ = ['Unit', 'UnitInstrumentation', 'instrumentation']
 logger = logging.getLogger('lms2.units')
 
 
+def _ctype(component):
+    return component.ctype if hasattr(component, 'ctype') else component.type()
+
+
+def _timed(component, times):
+    """ Wraps the construct method of a component, recording its construction time in times."""
+    construct = component.construct
+
+    def _construct(data=None):
+        tic = default_timer()
+        try:
+            return construct(data)
+        finally:
+            times[component.local_name] = default_timer() - tic
+
+    return _construct
+
+
+class UnitInstrumentation(object):
+    """
+    Construction statistics of Unit blocks.
+
+    When enabled, it records the construction time of each unit and of each of its components (i.e. of each rule),
+    and counts the components of the unit once it is constructed, including the ones added after its declaration
+    (e.g. by `fix_profile`), with their size. Construction times of units include the ones of their sub-units.
+    Components constructed as soon as they are added, during the construction of their unit, have no time.
+    Nothing is collected when disabled.
+
+    Example::
+
+        >>> m = microgrid_model()
+        >>> with instrumentation:
+        ...     inst = m.create_instance(data)
+        >>> instrumentation.to_frame()
+        >>> instrumentation.to_json('construction.json')
+    """
+
+    def __init__(self):
+        self.enabled    = False
+        self._records   = {}
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disable()
+
+    def enable(self):
+        """ Starts collecting statistics."""
+        self.enabled = True
+
+    def disable(self):
+        """ Stops collecting statistics."""
+        self.enabled = False
+
+    def reset(self):
+        """ Clears the collected statistics."""
+        self._records = {}
+
+    def constructed(self, unit, time, times=None):
+        """
+        Records the construction time of a unit, and the ctype, size and construction time of each of its components.
+
+        :param unit: constructed unit
+        :param float time: construction time of the unit (s)
+        :param dict times: construction time of each component, indexed by local names (s)
+        """
+        times = {} if times is None else times
+        components = {}
+        for c in unit.component_objects(descend_into=False):
+            components[c.local_name] = (_ctype(c).__name__, len(c) if c.is_indexed() else 1,
+                                        times.get(c.local_name, None))
+        self._records[id(unit)] = {'unit': unit, 'components': components, 'time': time}
+
+    def rules(self):
+        """
+        Size and construction time of each component of each unit.
+
+        :return: list of dict
+        """
+        return [{'unit': rec['unit'].name, 'component': name, 'ctype': ctype, 'size': size, 'time': time}
+                for rec in self._records.values()
+                for name, (ctype, size, time) in rec['components'].items()]
+
+    def summary(self):
+        """
+        Statistics of each unit: number of components, constructed variables and constraints, and construction time.
+
+        :return: dict of dict, indexed by unit names
+        """
+        res = {}
+        for rec in self._records.values():
+            s = res.setdefault(rec['unit'].name, {'class': type(rec['unit']).__name__,
+                                                  'components': 0, 'variables': 0, 'constraints': 0, 'time': 0.})
+            s['components'] += len(rec['components'])
+            s['time']       += rec['time']
+            for ctype, size, _ in rec['components'].values():
+                if ctype in ('Var', 'DerivativeVar'):
+                    s['variables'] += size
+                elif ctype == 'Constraint':
+                    s['constraints'] += size
+        return res
+
+    def to_frame(self, rules=False):
+        """
+        Statistics as a DataFrame, sorted by construction time.
+
+        :param bool rules: statistics of each component instead of each unit
+        :return: DataFrame
+        """
+        from pandas import DataFrame
+
+        if rules:
+            return DataFrame(self.rules(), columns=['unit', 'component', 'ctype', 'size', 'time'])\
+                .sort_values('time', ascending=False)
+        return DataFrame.from_dict(self.summary(), orient='index').sort_values('time', ascending=False)
+
+    def to_json(self, path=None):
+        """
+        Dumps the statistics as json.
+
+        :param path: output file (optional)
+        :return: json string
+        """
+        s = json.dumps({'units': self.summary(), 'rules': self.rules()}, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(s)
+        return s
+
+
+instrumentation = UnitInstrumentation()
+
+
 class Unit(SimpleBlock):
     """
     redefinition of SimpleBlock
@@ -28,7 +165,26 @@ class Unit(SimpleBlock):
         super().__init__(*args, **kwds)
         logger.info(f'Initiation of {self.name}...')
 
+    def construct(self, data=None):
+        if not instrumentation.enabled or self._constructed:
+            return super().construct(data)
+        times   = {}
+        pending = [c for c in self.component_objects(descend_into=False) if not c._constructed]
+        for c in pending:
+            c.construct = _timed(c, times)
+
+        tic = default_timer()
+        try:
+            res = super().construct(data)
+        finally:
+            for c in pending:
+                del c.construct
+        instrumentation.constructed(self, default_timer() - tic, times)
+        return res
+
     def __setattr__(self, key, value):
 
         super().__setattr__(key, value)
-        logger.debug(f'adding the attribute : {key} = {value}')
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('adding the attribute : %s = %s', key, value)
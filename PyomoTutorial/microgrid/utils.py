@@ -4,13 +4,78 @@
 Utils and tool for linearization and plots
 """
 
-from pandas import Series
+from pandas import Series, DataFrame
+
+import numpy as np
+
+__all__ = ['to_frame', 'pplot']
+
+
+def _component_series(component, dtype=None):
+    """
+    Values of an indexed Var, Param, Expression or Constraint (body), as a Series sorted by index.
+
+    :param component: indexed pyomo component
+    :param dtype: numpy dtype of the values (float64 by default)
+    :return: Series
+    """
+    from pyomo.environ import Var, Param, Expression, Constraint, value
+
+    keys = list(component.keys())
+    try:
+        keys.sort()
+    except TypeError:
+        pass
+
+    if isinstance(component, Var):
+        values = [component[k].value for k in keys]
+    elif isinstance(component, Param):
+        values = [value(component[k]) for k in keys]
+    elif isinstance(component, Expression):
+        values = [value(component[k], exception=False) for k in keys]
+    elif isinstance(component, Constraint):
+        values = [value(component[k].body, exception=False) for k in keys]
+    else:
+        raise(NotImplementedError(f'Argument "component" must be of type Param, Var, Expression or Constraint, '
+                                  f'but is actually {component, type(component)}'))
+
+    return Series(np.array(values, dtype=np.float64 if dtype is None else dtype), index=keys)
+
+
+def to_frame(block, ctypes=None, active=True, descend_into=True, dtype=None):
+    """
+    Extracts every time indexed component of a block tree into one DataFrame indexed by time, in a single pass.
+
+    Components are time indexed if their index set is a ContinuousSet. Columns are named after the components,
+    relatively to the block.
+
+    :param block: Block
+    :param ctypes: component types to be extracted (Var, Param, Expression and Constraint by default)
+    :param bool active: only extract active components
+    :param bool descend_into: extract the components of the sub-blocks
+    :param dtype: numpy dtype of the values, e.g. numpy.float32 for reducing memory (float64 by default)
+    :return: DataFrame
+    """
+    from pyomo.environ import Var, Param, Expression, Constraint
+    from pyomo.dae import ContinuousSet
+
+    if ctypes is None:
+        ctypes = (Var, Param, Expression, Constraint)
+
+    columns = {}
+    for comp in block.component_objects(ctype=tuple(ctypes), active=active, descend_into=descend_into):
+        if not comp.is_indexed() or not isinstance(comp.index_set(), ContinuousSet):
+            continue
+        columns[comp.getname(fully_qualified=True, relative_to=block)] = _component_series(comp, dtype=dtype)
+
+    return DataFrame(columns)
+
 
 def _pplot(variable, index=None, fig=None, ax=None, **kwarg):
     """
     Function that plots pyomo Variable or Parameter
 
-        :param var: Var or Param to be plotted
+        :param var: Var, Param, Expression, Constraint or Series to be plotted
         :param index: New index for plotting purpose (optional)
         :param fig: figure handle (optional)
         :param ax: axes handle (optional)
@@ -24,7 +89,6 @@ def _pplot(variable, index=None, fig=None, ax=None, **kwarg):
 
     """
     import matplotlib.pyplot as plt
-    from pyomo.environ import Var, Param, Expression, value, Constraint
 
     if fig is None:
         fig = plt.figure()
@@ -38,56 +102,34 @@ def _pplot(variable, index=None, fig=None, ax=None, **kwarg):
     else:
         raise ValueError('fig should be either None or a Figure.')
 
-    if isinstance(variable, Var):
-        if index is None:
-            ld = Series(variable.get_values()).sort_index().plot(label=variable.name.replace('_', '\_'), fig=fig,
-                                                                 ax=ax, **kwarg)
-        else:
-            s = Series(variable.get_values()).sort_index()
-            s.index = index
-            ld = s.plot(label=variable.name.replace('_', '\_'), fig=fig, ax=ax, **kwarg)
-
-    elif isinstance(variable, Param):
-        if index is None:
-            ld = Series(variable.extract_values()).sort_index().plot(label=variable.name.replace('_', '\_'), fig=fig,
-                                                                     ax=ax, **kwarg)
-        else:
-            s = Series(variable.extract_values()).sort_index()
-            s.index = index
-            ld = s.plot(label=variable.name.replace('_', '\_'), fig=fig, ax=ax, **kwarg)
-
-    elif isinstance(variable, Expression):
-        if index is None:
-            ld = Series([value(v) for v in variable.values()]).sort_index().plot(label=variable.name.replace('_', '\_'),
-                                                                                 fig=fig, ax=ax, **kwarg)
-        else:
-            s = Series([value(v) for v in variable.values()])
-            s.index = index
-            ld = s.plot(label=variable.name.replace('_', '\_'), fig=fig, ax=ax, **kwarg)
-
-    elif isinstance(variable, Constraint):
-        if index is None:
-            ld = Series([v() for v in variable.values()]).sort_index().plot(label=variable.name.replace('_', '\_'),
-                                                                                 fig=fig, ax=ax, **kwarg)
-        else:
-            s = Series([v() for v in variable.values()])
-            s.index = index
-            ld = s.plot(label=variable.name.replace('_', '\_'), fig=fig, ax=ax, **kwarg)
-
+    if isinstance(variable, Series):
+        s = variable
     else:
-        raise(NotImplementedError(f'Argument "variable" must be of type Param or Var, but is actually'
-                                  f'{variable, type(variable)}'))
+        s = _component_series(variable)
+        s.name = variable.name
+
+    if index is not None:
+        s = s.copy()
+        s.index = index
+
+    ld = s.plot(label=str(s.name).replace('_', '\\_'), fig=fig, ax=ax, **kwarg)
 
     return ld, ax, fig
 
 
 def pplot(*args, ax=None, fig=None, legend=True, title=None, grid=True, **kargs):
+    """
+    Plots pyomo components, Series, or all the columns of a DataFrame (e.g. returned by :func:`to_frame`).
+    """
 
     ncol            = kargs.pop('ncol', 4)
     loc             = kargs.pop('loc', 'lower left')
     bbox_to_anchor  = kargs.pop('bbox_to_anchor',(0, 1.02, 1, 0.2))
     mode            = kargs.pop('mode', "expand")
 
+    if len(args) == 1 and isinstance(args[0], DataFrame):
+        args = [args[0][c] for c in args[0].columns]
+
     lines = []
     ld, ax, fig = _pplot(args[0], ax=ax, fig=fig, **kargs)
     lines.append(ld)